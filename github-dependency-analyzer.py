@@ -1,21 +1,60 @@
 # fast_analyzer.py (v7 - final fix for PyPI API edge case)
 
+import argparse
 import asyncio
 import aiofiles
 import csv
+import email.utils
+import hashlib
 import json
+import logging
+import mmap
 import os
 import shutil
 import re
+import sqlite3
+import stat
+import subprocess
+import sys
+import tarfile
 import time
 import xml.etree.ElementTree as ET
 import tempfile
 import traceback
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import closing, nullcontext
+from contextvars import ContextVar
 from dataclasses import dataclass, field
+from functools import lru_cache
+from itertools import chain, islice
 from pathlib import Path
-from typing import Any, Dict, List, Optional, Set, Tuple
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Set, Tuple
+from urllib.parse import quote, unquote
 
 import aiohttp
+from aiolimiter import AsyncLimiter
+
+try:
+    import tomllib
+except ImportError:  # Python < 3.11
+    try:
+        import tomli as tomllib
+    except ImportError:
+        tomllib = None
+
+try:
+    import orjson
+    _json_loads = orjson.loads
+except ImportError:
+    _json_loads = json.loads
+
+try:
+    from lxml import etree as lxml_etree
+except ImportError:
+    lxml_etree = None
+
+# Per-dependency diagnostics; repository-level progress is printed directly
+logger = logging.getLogger(__name__)
 
 # --- Configuration ---
 
@@ -25,21 +64,168 @@ MAPPING_FILE = "dependency_mapping.csv"
 CSV_REPORT_FILE = "dependency_report.csv"
 MD_REPORT_FILE = "dependency_report.md"
 MISSING_MAPPING_FILE = "missing-dependency-mapping.csv"
+CACHE_FILE = "dependency_cache.sqlite"
+ERROR_LOG_FILE = "errors.log"
+# Large write buffer so reports go out in a few big writes
+REPORT_BUFFER_SIZE = 1 << 20
+
+# Clone into a RAM-backed tmpfs (Linux) when one has this much room to spare;
+# otherwise the platform's default temporary directory is used
+USE_RAMDISK = True
+RAMDISK_MIN_FREE_BYTES = 2 << 30
+# Tarballs that unpack to more than this (or to over half the RAM disk's free
+# space) are extracted on disk, so a few concurrent monorepos can't fill it
+RAMDISK_MAX_REPO_BYTES = 256 << 20
+
+# How long a cached registry lookup stays valid between runs
+CACHE_TTL_SECONDS = 7 * 24 * 60 * 60
+# Packages a registry doesn't know are rechecked sooner, in case they get published
+NEGATIVE_CACHE_TTL_SECONDS = 24 * 60 * 60
+# Per-repo scan results (keyed by HEAD commit) kept in the same file; least
+# recently used entries beyond this count are dropped on save
+REPO_CACHE_MAX_ENTRIES = 500
+# Stored with each scan result; bump when parsing changes so results from older
+# parsers are rescanned even though the repository's HEAD hasn't moved
+SCAN_CACHE_VERSION = 2
 
 # Limits to avoid excessive API calls
 MAX_CONCURRENT_REPOS = 5
-MAX_CONCURRENT_API_CALLS = 10
+# Override with DEPANALYZER_WORKERS to go easier on (or harder at) the registries
+MAX_CONCURRENT_API_CALLS = int(os.environ.get("DEPANALYZER_WORKERS", "10"))
+# No single registry may hold more of those slots than this, so one slow host
+# (Maven Central, typically) can't stall lookups against the others
+MAX_CONCURRENT_CALLS_PER_REGISTRY = 4
+# Requests per second allowed against each registry, to stay polite
+API_RATE_LIMITS = {
+    'pypi': 20,
+    'npm': 10,
+    'maven': 5,
+    'nuget': 20,
+}
+# Registry lookups per dependency type and repository; the alphabetically first
+# packages are looked up. DEPANALYZER_MAX_DEPS_PER_TYPE overrides every type.
 API_CALL_LIMIT_PER_TYPE = {
     'python': 25,
     'javascript': 50,
     'java': 25,
     'dotnet': 25
 }
+if os.environ.get("DEPANALYZER_MAX_DEPS_PER_TYPE"):
+    API_CALL_LIMIT_PER_TYPE = dict.fromkeys(API_CALL_LIMIT_PER_TYPE, int(os.environ["DEPANALYZER_MAX_DEPS_PER_TYPE"]))
+# Retries for transient network errors and these statuses, with exponential backoff (seconds)
+API_RETRIES = 2
+API_RETRY_BACKOFF = 0.2
+API_RETRY_STATUSES = {429, 500, 502, 503, 504}
+# A registry's Retry-After is honoured when longer than the backoff, up to this many seconds
+API_RETRY_AFTER_MAX = 30
+# Maven Central lookups coalesced into a single OR-query
+MAVEN_BATCH_SIZE = 20
+# ...as long as the encoded query stays short enough for proxies and the Solr front end
+MAVEN_QUERY_MAX_CHARS = 2000
+# Dependency files bigger than this are generated or vendored, never hand-written
+MAX_MANIFEST_SIZE = 2 << 20
+# Threads shared by all repos for reading and parsing dependency files
+PARSE_WORKERS = 8
+
+# Directories that are never worth descending into when scanning a clone
+SKIP_DIRS = {'.git', 'node_modules', 'venv', '.venv', '__pycache__', 'target', 'build', 'dist', 'bin', 'obj'}
+
+# Files picked out of the clone by scan_repo, bucketed by exact name
+DEPENDENCY_FILES = ['requirements.txt', 'pyproject.toml', 'package.json', 'pom.xml', 'build.gradle', 'project.json']
+LICENSE_FILES = ["LICENSE", "LICENSE.md", "LICENSE.txt", "COPYING"]
+# Preferred spellings first; any other casing (Readme.md, README.MD) is matched too
+README_FILES = ["README.md", "readme.md"]
+_README_NAMES = {name.lower() for name in README_FILES}
+# Files whose presence marks a repository type
+TYPE_MARKER_FILES = {
+    'requirements.txt': 'python',
+    'setup.py': 'python',
+    'package.json': 'javascript',
+    'pom.xml': 'java',
+    'build.gradle': 'java',
+    'packages.config': 'dotnet',
+}
+# Source and project file extensions that mark a repository type
+TYPE_EXTENSIONS = {
+    '.py': 'python',
+    '.js': 'javascript', '.jsx': 'javascript', '.mjs': 'javascript',
+    '.ts': 'javascript', '.tsx': 'javascript',
+    '.java': 'java',
+    '.cs': 'dotnet', '.csproj': 'dotnet', '.sln': 'dotnet',
+    # Pre-MSBuild .NET Core; its packages live in the sibling project.json
+    '.xproj': 'dotnet',
+}
+
+# Patterns used by the parsers, compiled once rather than on every file/line
+# PEP 508 requirement: name, optional [extras], then the version specifier up to
+# a marker (;), URL (@) or comment (#); old-style "name (>=1.0)" parentheses allowed
+_RE_REQUIREMENT = re.compile(r'([A-Za-z0-9][A-Za-z0-9._-]*)\s*(?:\[[^\]]*\])?\s*\(?([^;@#()]*)')
+_REQ_SKIP_PREFIXES = ('#', '-', '.', '/')
+# A bare URL or VCS requirement (git+https://...), which only names its package in an #egg= fragment
+_RE_URL_REQUIREMENT = re.compile(r'(?:[A-Za-z][A-Za-z0-9+.-]*://|(?:git|hg|svn|bzr)\+)')
+_RE_EGG_FRAGMENT = re.compile(r'[#&]egg=([A-Za-z0-9][A-Za-z0-9._-]*)')
+# Bytes patterns run directly over memory-mapped files (see _mapped_findall)
+_RE_POETRY = re.compile(rb'\[tool\.poetry\.dependencies\]\s*([^\[]+)', re.DOTALL)
+_RE_PEP621 = re.compile(rb'dependencies\s*=\s*\[\s*([^\]]+)\]', re.DOTALL)
+_RE_GRADLE_DEP = re.compile(rb'(?:implementation|compile|api)\s*[\'"]([^\'"]+)[\'"]')
+# A JSON string (kept) or a // or /* */ comment (dropped), for JSONC project.json files
+_RE_JSONC = re.compile(rb'("(?:\\.|[^"\\])*")|//[^\n]*|/\*.*?\*/', re.DOTALL)
+_RE_MD_FORMAT = re.compile(r'(\*\*|\*|__|_|`|\[.*\]\(.*\))')
+
+# License file headers carry the license name, so only the start is scanned
+LICENSE_HEAD_BYTES = 4096
+# Registry license fields longer than this hold license text rather than a name
+LICENSE_NAME_MAX_CHARS = 80
+# Phrase -> license id; whichever phrase appears first in the header wins
+LICENSE_MARKERS = [
+    ("mit license", "MIT"),
+    # Boost opens with a similar grant sentence, so MIT's is matched up to its own wording
+    ("boost software license", "BSL-1.0"),
+    ("permission is hereby granted, free of charge, to any person obtaining a copy "
+     "of this software and associated documentation files", "MIT"),
+    ("apache license", "Apache-2.0"),
+    ("gnu affero general public license", "AGPL"),
+    ("gnu lesser general public license", "LGPL"),
+    ("gnu general public license", "GPL"),
+    ("mozilla public license", "MPL-2.0"),
+    ("isc license", "ISC"),
+    ("redistribution and use in source and binary forms", "BSD"),
+    ("this is free and unencumbered software", "Unlicense"),
+]
+# All markers fused into one alternation so a header is scanned once; group
+# `l<i>` identifies the marker, and words may be split across wrapped lines
+_RE_LICENSE = re.compile("|".join(
+    f"(?P<l{i}>" + r'\s+'.join(map(re.escape, marker.split())) + ")"
+    for i, (marker, _) in enumerate(LICENSE_MARKERS)
+), re.IGNORECASE)
+# Older NuGet packages only publish a licenseUrl; licenses.nuget.org URLs carry
+# the expression itself, other well-known hosts are recognised by a keyword
+_RE_LICENSE_URL = re.compile(
+    r'licenses\.nuget\.org/(?P<expression>[^/?#]+)|\b(?P<keyword>mit|apache|agpl|lgpl|gpl|bsd|ms-pl)\b',
+    re.IGNORECASE,
+)
+LICENSE_URL_KEYWORDS = {
+    "mit": "MIT", "apache": "Apache-2.0", "agpl": "AGPL", "lgpl": "LGPL",
+    "gpl": "GPL", "bsd": "BSD", "ms-pl": "MS-PL",
+}
+# Any of these in a registration leaf means its catalog entry was inlined
+_NUGET_INLINE_FIELDS = ("licenseExpression", "licenseUrl", "projectUrl")
+
+# GitHub repositories are fetched as a tarball of the default branch instead of cloned
+_RE_GITHUB_REPO = re.compile(r'^https?://github\.com/([^/]+)/([^/]+?)(?:\.git)?/?$')
+# Last path segment of any repository URL, without a trailing slash or .git
+_RE_REPO_NAME = re.compile(r'([^/]+?)(?:\.git)?/*$')
+GITHUB_TARBALL_URL = "https://codeload.github.com/{owner}/{repo}/tar.gz/HEAD"
+
+MAVEN_NS = '{http://maven.apache.org/POM/4.0.0}'
+MSBUILD_NS = '{http://schemas.microsoft.com/developer/msbuild/2003}'
+# Oldest git whose clients handle partial clones (--filter) and protocol v2
+GIT_PARTIAL_CLONE_VERSION = (2, 19)
 
 
 # --- Data Structures ---
 
-@dataclass
+@dataclass(slots=True)
 class Dependency:
     """Represents a single dependency."""
     name: str
@@ -48,7 +234,19 @@ class Dependency:
     license: str = "Unknown"
     url: str = ""
 
-@dataclass
+@dataclass(slots=True, frozen=True)
+class MappingEntry:
+    """A manual override from the mapping file, ready to apply to a dependency."""
+    version: str
+    license: str
+    url: str
+
+@lru_cache(maxsize=8192)
+def mapping_key(dep_type: str, name: str) -> str:
+    """The mapping-file key for a dependency. The same packages recur across repos, so it's memoized."""
+    return f"{dep_type.lower()}:{name.lower()}"
+
+@dataclass(slots=True)
 class RepoReport:
     """Holds the analysis results for a single repository."""
     url: str
@@ -59,201 +257,617 @@ class RepoReport:
     dependencies: List[Dependency] = field(default_factory=list)
 
 
+# --- Repository Scanning ---
+
+RepoIndex = Tuple[List[str], Dict[str, List[Path]]]
+
+def _new_buckets() -> Dict[str, List[Path]]:
+    buckets: Dict[str, List[Path]] = {name: [] for name in DEPENDENCY_FILES}
+    buckets.update({'*.csproj': [], 'license': [], 'readme': []})
+    return buckets
+
+def _index_file(filename: str, path: Path, depth: int, types: Set[str], buckets: Dict[str, List[Path]]):
+    """Records one file's contribution to the repo types and parser buckets."""
+    dot = filename.rfind('.')
+    ext = filename[dot:] if dot > 0 else ''
+    if ext in TYPE_EXTENSIONS:
+        types.add(TYPE_EXTENSIONS[ext])
+    elif filename in TYPE_MARKER_FILES:
+        types.add(TYPE_MARKER_FILES[filename])
+
+    if filename in DEPENDENCY_FILES:
+        buckets[filename].append(path)
+    elif ext == '.csproj':
+        buckets['*.csproj'].append(path)
+    elif filename in LICENSE_FILES and depth <= 1:
+        buckets['license'].append(path)
+    elif depth == 0 and filename.lower() in _README_NAMES:
+        buckets['readme'].append(path)
+
+def _finish_index(repo_path: Path, types: Set[str], buckets: Dict[str, List[Path]]) -> RepoIndex:
+    # Root-level licenses win; then the historical order, LICENSE before LICENSE.md etc.
+    buckets['license'].sort(key=lambda f: (f.parent != repo_path, LICENSE_FILES.index(f.name)))
+    buckets['readme'].sort(key=lambda f: README_FILES.index(f.name) if f.name in README_FILES else len(README_FILES))
+    return list(types), buckets
+
+def scan_repo(repo_path: Path) -> RepoIndex:
+    """Walks the repository once, detecting its types and bucketing the files the parsers need.
+
+    Buckets are keyed by file name for dependency files, '*.csproj' for project
+    files, and 'license' / 'readme' for repository metadata.
+    """
+    types: Set[str] = set()
+    buckets = _new_buckets()
+    # Explicit stack of (directory, depth); scandir's DirEntry answers is_dir()
+    # from the directory listing itself, avoiding the extra stat os.walk makes
+    stack = [(str(repo_path), 0)]
+    while stack:
+        root, depth = stack.pop()
+        try:
+            entries = os.scandir(root)
+        except OSError:
+            continue
+        with entries:
+            for entry in entries:
+                if entry.is_dir(follow_symlinks=False):
+                    if entry.name not in SKIP_DIRS:
+                        stack.append((entry.path, depth + 1))
+                    continue
+                _index_file(entry.name, Path(entry.path), depth, types, buckets)
+    return _finish_index(repo_path, types, buckets)
+
+def index_git_tree(repo_path: Path, tree: bytes) -> Tuple[RepoIndex, Dict[Path, str]]:
+    """Builds the scan index from `git ls-tree -r -z` output instead of a checkout.
+
+    Also returns the blob id of every bucketed file, so only those need writing out.
+    """
+    types: Set[str] = set()
+    buckets = _new_buckets()
+    blobs: Dict[Path, str] = {}
+    for record in tree.decode('utf-8', errors='surrogateescape').split('\0'):
+        meta, _, rel_path = record.partition('\t')
+        fields = meta.split()
+        if len(fields) != 3 or fields[1] != 'blob' or fields[0] == '120000':
+            continue  # Trailing empty record, a submodule or a symlink
+        *dirs, filename = rel_path.split('/')
+        if '..' in dirs or any(d in SKIP_DIRS for d in dirs):
+            continue
+        path = repo_path.joinpath(rel_path)
+        _index_file(filename, path, len(dirs), types, buckets)
+        blobs[path] = fields[2]
+    wanted = {path for paths in buckets.values() for path in paths}
+    return _finish_index(repo_path, types, buckets), {p: oid for p, oid in blobs.items() if p in wanted}
+
+def _write_blobs(batch_output: bytes, paths: List[Path]):
+    """Writes `git cat-file --batch` responses, given in request order, to their paths."""
+    view = memoryview(batch_output)
+    pos = 0
+    for path in paths:
+        newline = batch_output.index(b'\n', pos)
+        header = batch_output[pos:newline].split()
+        pos = newline + 1
+        if len(header) != 3:
+            continue  # "<oid> missing"
+        size = int(header[2])
+        path.parent.mkdir(parents=True, exist_ok=True)
+        with open(path, 'wb') as f:
+            f.write(view[pos:pos + size])
+        pos += size + 1  # Content is followed by a newline
+
+
 # --- File Parsers ---
 
-def parse_python_deps(repo_path: Path) -> Dict[str, str]:
-    """Parses Python dependency files."""
-    deps = {}
-    # requirements.txt
-    for req_file in repo_path.rglob('requirements.txt'):
-        try:
-            with open(req_file, 'r', encoding='utf-8', errors='ignore') as f:
-                for line in f:
-                    line = line.strip()
-                    if line and not line.startswith('#'):
-                        match = re.match(r'([a-zA-Z0-9_.-]+)', line)
-                        if match:
-                            deps[match.group(1)] = 'latest'
-        except Exception as e:
-            print(f"Warning: Could not parse {req_file}: {e}")
-    # pyproject.toml
-    for toml_file in repo_path.rglob('pyproject.toml'):
-        try:
-            with open(toml_file, 'r', encoding='utf-8', errors='ignore') as f:
-                content = f.read()
-                matches = re.findall(r'\[tool\.poetry\.dependencies\]\s*([^\[]+)', content, re.DOTALL)
-                if not matches:
-                    matches = re.findall(r'dependencies\s*=\s*\[\s*([^\]]+)\]', content, re.DOTALL)
-                for block in matches:
-                    for line in block.split('\n'):
-                        line = line.strip().strip('"\'')
-                        if line and not line.startswith('#'):
-                             match = re.match(r'([a-zA-Z0-9_.-]+)', line)
-                             if match:
-                                 deps[match.group(1)] = 'latest'
-        except Exception as e:
-            print(f"Warning: Could not parse {toml_file}: {e}")
+# File parsing is mostly IO and regex/XML work in C, which releases the GIL
+_PARSE_POOL = ThreadPoolExecutor(max_workers=PARSE_WORKERS, thread_name_prefix="parse")
 
-    return deps
+def _unique_files(paths: List[Path]) -> Iterator[Path]:
+    """Yields paths, skipping oversized files and files byte-identical to one already yielded.
 
-def parse_js_deps(repo_path: Path) -> Dict[str, str]:
-    """Parses package.json for JavaScript dependencies."""
-    deps = {}
-    for pkg_file in repo_path.rglob('package.json'):
+    Monorepos often copy the same manifest into many sub-packages; hashing is
+    much cheaper than parsing each copy again.
+    """
+    seen: Set[bytes] = set()
+    for path in paths:
         try:
-            with open(pkg_file, 'r', encoding='utf-8', errors='ignore') as f:
-                data = json.load(f)
-                if isinstance(data, dict):
-                    deps.update(data.get('dependencies', {}))
-                    deps.update(data.get('devDependencies', {}))
-        except Exception as e:
-            print(f"Warning: Could not parse {pkg_file}: {e}")
-    return deps
+            hasher = hashlib.blake2b(digest_size=16)
+            with open(path, 'rb') as f:
+                size = os.fstat(f.fileno()).st_size
+                if size > MAX_MANIFEST_SIZE:
+                    print(f"Warning: Skipping {path}: {size} bytes is too large for a manifest")
+                    continue
+                for chunk in iter(lambda: f.read(1 << 16), b''):
+                    hasher.update(chunk)
+        except OSError:
+            yield path  # Let the parser report the problem
+            continue
+        digest = hasher.digest()
+        if digest not in seen:
+            seen.add(digest)
+            yield path
+
+def _mapped_findall(path: Path, pattern: re.Pattern) -> List[Tuple[str, ...]]:
+    """Runs a bytes pattern over a memory-mapped file, decoding only the captured groups."""
+    with open(path, 'rb') as f:
+        if os.fstat(f.fileno()).st_size == 0:
+            return []  # mmap refuses empty files
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            return [
+                tuple(g.decode('utf-8', errors='ignore') for g in m.groups())
+                for m in pattern.finditer(mm)
+            ]
+
+def _parse_requirement(requirement: str) -> Optional[Tuple[str, str]]:
+    """Splits a PEP 508 requirement into its name and specifier ('latest' if unpinned).
+
+    Direct references (`name @ https://...`) are unpinned. Bare URLs yield their
+    #egg= name, or None when they don't have one.
+    """
+    requirement = requirement.strip()
+    if _RE_URL_REQUIREMENT.match(requirement):
+        egg = _RE_EGG_FRAGMENT.search(requirement)
+        return (egg.group(1), 'latest') if egg else None
+    match = _RE_REQUIREMENT.match(requirement)
+    if not match:
+        return None
+    return match.group(1), ''.join(match.group(2).split()) or 'latest'
+
+def _pyproject_requirements(data: Dict[str, Any]) -> Iterator[Tuple[str, str]]:
+    """Yields (name, version) pairs from a parsed pyproject.toml.
+
+    Covers PEP 621 dependencies and optional-dependencies, build-system
+    requirements, and Poetry's dependency tables (including groups), which map
+    package names to a constraint string or a table with a "version" key.
+    """
+    requirements = []
+    project = data.get("project", {})
+    requirements.extend(project.get("dependencies", []))
+    for group in project.get("optional-dependencies", {}).values():
+        requirements.extend(group)
+    requirements.extend(data.get("build-system", {}).get("requires", []))
+    for requirement in requirements:
+        if isinstance(requirement, str):
+            parsed = _parse_requirement(requirement)
+            if parsed:
+                yield parsed
+
+    poetry = data.get("tool", {}).get("poetry", {})
+    tables = [poetry.get("dependencies", {}), poetry.get("dev-dependencies", {})]
+    tables.extend(g.get("dependencies", {}) for g in poetry.get("group", {}).values())
+    for table in tables:
+        for name, constraint in table.items():
+            if name.lower() == "python":
+                continue
+            if isinstance(constraint, dict):
+                constraint = constraint.get("version")
+            yield name, constraint if isinstance(constraint, str) and constraint != "*" else 'latest'
+
+def _requirements_txt_deps(req_file: Path) -> Iterator[Tuple[str, str]]:
+    with open(req_file, 'r', encoding='utf-8', errors='ignore') as f:
+        for line in f:
+            # A trailing backslash continues the requirement onto --hash lines (pip-compile --generate-hashes)
+            line = line.strip().rstrip('\\').rstrip()
+            # Cheap prefix test first: comments, pip options (-r, -e, --hash
+            # continuations) and local paths never name a package
+            if line and not line.startswith(_REQ_SKIP_PREFIXES):
+                parsed = _parse_requirement(line)
+                if parsed:
+                    yield parsed
+
+def _pyproject_deps(toml_file: Path) -> Iterator[Tuple[str, str]]:
+    if tomllib:
+        with open(toml_file, 'rb') as f:
+            data = tomllib.load(f)
+        yield from _pyproject_requirements(data)
+        return
+    # Regex fallback for interpreters without a TOML parser
+    matches = _mapped_findall(toml_file, _RE_POETRY) or _mapped_findall(toml_file, _RE_PEP621)
+    for (block,) in matches:
+        for line in block.split('\n'):
+            line = line.strip().strip('"\'')
+            if line and not line.startswith('#'):
+                # Poetry lines are `name = "constraint"`, so only the name is reliable here
+                match = _RE_REQUIREMENT.match(line)
+                if match:
+                    yield match.group(1), 'latest'
+
+def _package_json_deps(pkg_file: Path) -> Iterator[Tuple[str, str]]:
+    with open(pkg_file, 'rb') as f:
+        data = _json_loads(f.read())
+    if isinstance(data, dict):
+        yield from data.get('dependencies', {}).items()
+        yield from data.get('devDependencies', {}).items()
+
+_POM_DEPENDENCY_TAGS = (f'{MAVEN_NS}dependency', 'dependency')
+_CSPROJ_PACKAGE_TAGS = (f'{MSBUILD_NS}PackageReference', 'PackageReference')
+
+def _iter_xml_elements(xml_file: Path, tags: Tuple[str, ...]):
+    """Streams matching elements from an XML file without building the full tree.
+
+    Older poms and csproj files omit their namespace, so callers pass both tag forms.
+    """
+    if lxml_etree is not None:
+        for _, elem in lxml_etree.iterparse(str(xml_file), tag=tags):
+            yield elem
+            elem.clear()
+        return
+    for _, elem in ET.iterparse(xml_file):
+        if elem.tag in tags:
+            yield elem
+            elem.clear()
+
+def _pom_deps(pom_file: Path) -> Iterator[Tuple[str, str]]:
+    for dep in _iter_xml_elements(pom_file, _POM_DEPENDENCY_TAGS):
+        # Children share the <dependency> element's namespace, if any
+        ns = dep.tag[:-len('dependency')]
+        group_id = dep.findtext(f'{ns}groupId', '')
+        artifact_id = dep.findtext(f'{ns}artifactId', '')
+        version = dep.findtext(f'{ns}version', '${project.version}')
+        if group_id and artifact_id:
+            yield f"{group_id}:{artifact_id}", version
+
+def _gradle_deps(gradle_file: Path) -> Iterator[Tuple[str, str]]:
+    for (match,) in _mapped_findall(gradle_file, _RE_GRADLE_DEP):
+        parts = match.split(':')
+        if len(parts) >= 2:
+            yield f"{parts[0]}:{parts[1]}", parts[2] if len(parts) > 2 else 'latest'
+
+def _csproj_deps(csproj_file: Path) -> Iterator[Tuple[str, str]]:
+    for ref in _iter_xml_elements(csproj_file, _CSPROJ_PACKAGE_TAGS):
+        # Update sets metadata on an implicitly included package
+        name = ref.get('Include') or ref.get('Update')
+        ns = ref.tag[:-len('PackageReference')]
+        # Version is an attribute, or a child element in older SDK-style projects
+        version = ref.get('Version') or ref.findtext(f'{ns}Version') or 'latest'
+        if name:
+            yield name, version.strip()
+
+def _project_json_deps(project_file: Path) -> Iterator[Tuple[str, str]]:
+    with open(project_file, 'rb') as f:
+        content = f.read()
+    try:
+        data = _json_loads(content)
+    except ValueError:
+        # project.json tooling accepted comments; strip them and retry
+        data = _json_loads(_RE_JSONC.sub(lambda m: m.group(1) or b'', content))
+    if not isinstance(data, dict):
+        return
+    tables = [data.get('dependencies')]
+    frameworks = data.get('frameworks')
+    if isinstance(frameworks, dict):
+        tables.extend(fw.get('dependencies') for fw in frameworks.values() if isinstance(fw, dict))
+    for table in tables:
+        if not isinstance(table, dict):
+            continue
+        for name, spec in table.items():
+            # Either "1.0.0" or {"version": "1.0.0", "type": "platform"}
+            version = spec.get('version') if isinstance(spec, dict) else spec
+            yield name, version if isinstance(version, str) else 'latest'
+
+ManifestParser = Callable[[Path], Iterator[Tuple[str, str]]]
+
+# Repository type -> scan bucket -> per-file parser. Buckets are listed in merge
+# order: a package found again in a later file takes that file's version.
+MANIFEST_PARSERS: Dict[str, Dict[str, ManifestParser]] = {
+    'python': {'requirements.txt': _requirements_txt_deps, 'pyproject.toml': _pyproject_deps},
+    'javascript': {'package.json': _package_json_deps},
+    'java': {'pom.xml': _pom_deps, 'build.gradle': _gradle_deps},
+    'dotnet': {'*.csproj': _csproj_deps, 'project.json': _project_json_deps},
+}
 
-def parse_java_deps(repo_path: Path) -> Dict[str, str]:
-    """Parses pom.xml and build.gradle for Java dependencies."""
-    deps = {}
-    # pom.xml (Maven)
-    for pom_file in repo_path.rglob('pom.xml'):
-        try:
-            tree = ET.parse(pom_file)
-            ns = {'m': 'http://maven.apache.org/POM/4.0.0'}
-            for dep in tree.findall('.//m:dependency', ns):
-                group_id = dep.findtext('m:groupId', '', ns)
-                artifact_id = dep.findtext('m:artifactId', '', ns)
-                version = dep.findtext('m:version', '${project.version}', ns)
-                if group_id and artifact_id:
-                    deps[f"{group_id}:{artifact_id}"] = version
-        except ET.ParseError as e:
-            print(f"Warning: Could not parse {pom_file}: {e}")
-
-    # build.gradle (Gradle)
-    for gradle_file in repo_path.rglob('build.gradle'):
-         try:
-            with open(gradle_file, 'r', encoding='utf-8', errors='ignore') as f:
-                content = f.read()
-                matches = re.findall(r'(?:implementation|compile|api)\s*[\'"]([^\'"]+)[\'"]', content)
-                for match in matches:
-                    parts = match.split(':')
-                    if len(parts) >= 2:
-                        name = f"{parts[0]}:{parts[1]}"
-                        version = parts[2] if len(parts) > 2 else 'latest'
-                        deps[name] = version
-         except Exception as e:
-             print(f"Warning: Could not parse {gradle_file}: {e}")
+def _parse_manifest(job: Tuple[ManifestParser, Path]) -> Dict[str, str]:
+    """Runs one parser over one file.
 
+    A file that fails part-way still contributes the dependencies read before the error.
+    Names and versions are interned: the same packages and pins recur across files
+    and repos, and every report row then shares one string object per value.
+    """
+    parse_one, path = job
+    deps: Dict[str, str] = {}
+    try:
+        for name, version in parse_one(path):
+            deps[sys.intern(name)] = sys.intern(version) if type(version) is str else version
+    except Exception as e:
+        print(f"Warning: Could not parse {path}: {e}")
     return deps
 
-def parse_dotnet_deps(repo_path: Path) -> Dict[str, str]:
-    """Parses .csproj files for .NET dependencies."""
-    deps = {}
-    for csproj_file in repo_path.rglob('*.csproj'):
-        try:
-            with open(csproj_file, 'r', encoding='utf-8', errors='ignore') as f:
-                content = f.read()
-            matches = re.findall(r'<PackageReference\s+Include="([^"]+)"\s+Version="([^"]+)"', content)
-            for pkg, version in matches:
-                deps[pkg] = version
-        except Exception as e:
-            print(f"Warning: Could not parse {csproj_file}: {e}")
-
+def parse_dependencies(dep_type: str, files: Dict[str, List[Path]]) -> Dict[str, str]:
+    """Parses every distinct manifest of one repository type in a single pass over the pool."""
+    jobs = [
+        (parse_one, path)
+        for bucket, parse_one in MANIFEST_PARSERS[dep_type].items()
+        for path in _unique_files(files[bucket])
+    ]
+    deps: Dict[str, str] = {}
+    for file_deps in _PARSE_POOL.map(_parse_manifest, jobs):
+        deps.update(file_deps)
     return deps
 
 
 # --- Language & License Identification ---
 
-def determine_repo_types(repo_path: Path) -> List[str]:
-    """Determines repository types based on file extensions and names."""
-    types = set()
-    if next(repo_path.rglob("*.py"), None) or next(repo_path.rglob("requirements.txt"), None):
-        types.add("python")
-    if next(repo_path.rglob("package.json"), None):
-        types.add("javascript")
-    if next(repo_path.rglob("pom.xml"), None) or next(repo_path.rglob("build.gradle"), None):
-        types.add("java")
-    if next(repo_path.rglob("*.csproj"), None):
-        types.add("dotnet")
-    return list(types)
-
-def identify_repo_license(repo_path: Path) -> str:
+def classify_license_text(text: str) -> str:
+    """Maps the text of a license to its identifier, or "Custom" if unrecognised."""
+    # Case-insensitive and bounded by endpos, so the text is never copied
+    match = _RE_LICENSE.search(text, 0, LICENSE_HEAD_BYTES)
+    return LICENSE_MARKERS[int(match.lastgroup[1:])][1] if match else "Custom"
+
+def classify_license_url(url: str) -> Optional[str]:
+    """Maps a license URL to its identifier, or None if it doesn't name one."""
+    match = _RE_LICENSE_URL.search(url)
+    if not match:
+        return None
+    if match["expression"]:
+        return unquote(match["expression"])
+    return LICENSE_URL_KEYWORDS[match["keyword"].lower()]
+
+def identify_repo_license(files: Dict[str, List[Path]]) -> str:
     """Identifies the license of the repository from common license files."""
-    for license_filename in ["LICENSE", "LICENSE.md", "LICENSE.txt", "COPYING"]:
-        for license_file in repo_path.glob(f"**/{license_filename}"):
-            try:
-                with open(license_file, 'r', encoding='utf-8', errors='ignore') as f:
-                    content = f.read().lower()
-                if "mit license" in content: return "MIT"
-                if "apache license" in content: return "Apache-2.0"
-                if "gnu general public license" in content: return "GPL"
-                if "mozilla public license" in content: return "MPL-2.0"
-                return "Custom"
-            except Exception:
-                continue
+    for license_file in files['license']:
+        try:
+            with open(license_file, 'r', encoding='utf-8', errors='ignore') as f:
+                return classify_license_text(f.read(LICENSE_HEAD_BYTES))
+        except Exception:
+            continue
     return "Unknown"
 
-def extract_repo_description(repo_path: Path) -> str:
+def _first_paragraph(lines: Iterable[str]) -> Optional[str]:
+    """Returns the first blank-line-delimited paragraph that isn't a heading.
+
+    Consumes lines only up to that paragraph, so a README is read no further than needed.
+    """
+    paragraph: List[str] = []
+    heading = False
+    for line in chain(lines, ('',)):
+        if line.strip():
+            if not paragraph and not heading:
+                heading = line.lstrip().startswith('#')
+            if not heading:
+                paragraph.append(line)
+            continue
+        if paragraph:
+            return ''.join(paragraph).strip()
+        heading = False
+    return None
+
+def extract_repo_description(files: Dict[str, List[Path]]) -> str:
     """Extracts a description from the README.md file."""
-    for readme_filename in ["README.md", "readme.md"]:
-        readme_file = repo_path / readme_filename
-        if readme_file.exists():
-            try:
-                with open(readme_file, 'r', encoding='utf-8', errors='ignore') as f:
-                    content = f.read()
-                    # Find the first paragraph that isn't a title
-                    paragraphs = re.split(r'\n\s*\n', content)
-                    for p in paragraphs:
-                        p_clean = p.strip()
-                        if p_clean and not p_clean.startswith('#'):
-                            # Remove markdown formatting
-                            p_clean = re.sub(r'(\*\*|\*|__|_|`|\[.*\]\(.*\))', '', p_clean)
-                            return p_clean[:300] + '...' if len(p_clean) > 300 else p_clean
-            except Exception as e:
-                 print(f"Warning: Could not read {readme_file}: {e}")
+    for readme_file in files['readme']:
+        try:
+            with open(readme_file, 'r', encoding='utf-8', errors='ignore') as f:
+                p_clean = _first_paragraph(f)
+            if p_clean:
+                # Remove markdown formatting
+                p_clean = _RE_MD_FORMAT.sub('', p_clean)
+                return p_clean[:300] + '...' if len(p_clean) > 300 else p_clean
+        except Exception as e:
+             print(f"Warning: Could not read {readme_file}: {e}")
     return "No description available."
 
 
 # --- API Client (MODIFIED) ---
 
+# Set by APIClient._get when a request fails (as opposed to the registry answering,
+# even with a 404), so get_info knows whether an "Unknown" result can be cached
+_request_failed: ContextVar[bool] = ContextVar("_request_failed", default=False)
+
+_RE_PEP503_SEPARATORS = re.compile(r'[-_.]+')
+
+def _lookup_key(dep_type: str, name: str) -> Tuple[str, str]:
+    """The lookup cache key for a package, so spellings of one package share a lookup.
+
+    Registry names are case-insensitive, and Python ones also treat runs of
+    "-", "_" and "." alike (PEP 503), so Flask_Login and flask-login are one package.
+    """
+    name = name.lower()
+    if dep_type == "python":
+        name = _RE_PEP503_SEPARATORS.sub("-", name)
+    return dep_type, name
+
+def _retry_after_seconds(value: Optional[str]) -> float:
+    """Parses a Retry-After header (delta-seconds or an HTTP date); 0 if absent or invalid."""
+    if not value:
+        return 0.0
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, email.utils.parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return 0.0
+
 class APIClient:
     """A client to fetch dependency data from various package managers."""
 
-    def __init__(self, semaphore: asyncio.Semaphore):
+    def __init__(self, semaphore: asyncio.Semaphore, cache_file: Optional[str] = CACHE_FILE):
         self._session: Optional[aiohttp.ClientSession] = None
         self.semaphore = semaphore
+        self.cache_file = cache_file
+        # _lookup_key(type, name) -> lookup shared by every repo needing it
+        self._cache: Dict[Tuple[str, str], asyncio.Future] = {}
+        # Lookups made during this run, written back to cache_file on exit
+        self._fetched: Dict[Tuple[str, str], Tuple[str, str]] = {}
+        # Leaky-bucket limiter per registry; a quiet bucket admits a burst of up to `rate`
+        self._limiters = {host_key: AsyncLimiter(rate, 1) for host_key, rate in API_RATE_LIMITS.items()}
+        self._registry_slots = {
+            host_key: asyncio.Semaphore(MAX_CONCURRENT_CALLS_PER_REGISTRY) for host_key in self._limiters
+        }
+        self.fetchers = {
+            "python": self.get_python_info,
+            "javascript": self.get_js_info,
+            "java": self.get_java_info,
+            "dotnet": self.get_dotnet_info,
+        }
 
     async def __aenter__(self):
-        self._session = aiohttp.ClientSession(timeout=aiohttp.ClientTimeout(total=15))
+        # Keep connections to the few registry hosts alive and DNS cached for the run.
+        # Tarball downloads share the pool, so it has room for one per repository
+        # on top of the API calls; otherwise long downloads starve the lookups.
+        connector = aiohttp.TCPConnector(
+            limit=MAX_CONCURRENT_API_CALLS + MAX_CONCURRENT_REPOS,
+            limit_per_host=max(MAX_CONCURRENT_API_CALLS, MAX_CONCURRENT_REPOS),
+            ttl_dns_cache=600,
+            keepalive_timeout=60,
+        )
+        self._session = aiohttp.ClientSession(
+            connector=connector,
+            timeout=aiohttp.ClientTimeout(total=15, sock_connect=5),
+            headers={"Accept-Encoding": "gzip", "User-Agent": "dep-analyzer/1.0"},
+        )
+        self._load_cache()
         return self
 
     async def __aexit__(self, exc_type, exc_val, exc_tb):
         if self._session and not self._session.closed:
             await self._session.close()
+        self._save_cache()
 
-    async def _get(self, url: str) -> Optional[Dict]:
-        """Performs a GET request and returns JSON, handling errors."""
-        async with self.semaphore:
-            try:
-                if not self._session or self._session.closed:
-                    print(f"Warning: Session is closed. Cannot fetch {url}.")
-                    return None
-                await asyncio.sleep(0.1) # Be nice to the APIs
-                async with self._session.get(url) as response:
-                    if response.status == 200:
-                        return await response.json()
-                    else:
-                        print(f"Warning: API request failed for {url} with status {response.status}")
+    def _load_cache(self):
+        """Seeds the lookup cache with unexpired entries from previous runs."""
+        if not self.cache_file:
+            return
+        loop = asyncio.get_running_loop()
+        try:
+            with closing(sqlite3.connect(self.cache_file)) as conn, conn:
+                conn.execute(
+                    "CREATE TABLE IF NOT EXISTS cache (type TEXT, name TEXT, license TEXT, url TEXT, "
+                    "ts INTEGER, PRIMARY KEY (type, name))"
+                )
+                now = int(time.time())
+                rows = conn.execute(
+                    "SELECT type, name, license, url FROM cache "
+                    "WHERE ts > CASE WHEN license = 'Unknown' THEN ? ELSE ? END",
+                    (now - NEGATIVE_CACHE_TTL_SECONDS, now - CACHE_TTL_SECONDS)
+                ).fetchall()
+        except sqlite3.Error as e:
+            print(f"Warning: Could not read cache `{self.cache_file}`: {e}")
+            return
+        for dep_type, name, license_str, url in rows:
+            future = loop.create_future()
+            future.set_result((license_str, url))
+            self._cache[(dep_type, name)] = future
+        if rows:
+            print(f"Loaded {len(rows)} cached dependency lookups from `{self.cache_file}`")
+
+    def _save_cache(self):
+        """Writes the lookups made during this run back to the cache file."""
+        if not self.cache_file or not self._fetched:
+            return
+        now = int(time.time())
+        try:
+            with closing(sqlite3.connect(self.cache_file)) as conn, conn:
+                conn.executemany(
+                    "INSERT OR REPLACE INTO cache (type, name, license, url, ts) VALUES (?, ?, ?, ?, ?)",
+                    [(t, n, lic, url, now) for (t, n), (lic, url) in self._fetched.items()]
+                )
+        except sqlite3.Error as e:
+            print(f"Warning: Could not write cache `{self.cache_file}`: {e}")
+
+    async def _get(self, url: str, host_key: str) -> Optional[Dict]:
+        """Performs a GET request and returns JSON, handling errors.
+
+        `host_key` selects the registry's rate limiter and concurrency cap, which
+        are acquired before the shared semaphore so throttled requests don't hold a slot.
+        """
+        retry_after = 0.0
+        for attempt in range(API_RETRIES + 1):
+            if attempt:
+                # Back off outside the limiter and semaphore so others can proceed
+                await asyncio.sleep(min(max(API_RETRY_BACKOFF * 2 ** (attempt - 1), retry_after), API_RETRY_AFTER_MAX))
+            async with self._limiters[host_key], self._registry_slots[host_key], self.semaphore:
+                try:
+                    if not self._session or self._session.closed:
+                        logger.warning("Session is closed. Cannot fetch %s.", url)
+                        _request_failed.set(True)
+                        return None
+                    async with self._session.get(url) as response:
+                        if response.status == 200:
+                            return _json_loads(await response.read())
+                        if response.status in API_RETRY_STATUSES and attempt < API_RETRIES:
+                            # Throttled or a gateway hiccup; back off (as told, if told) and retry
+                            retry_after = _retry_after_seconds(response.headers.get("Retry-After"))
+                            continue
+                        # 404 is the registry's answer (no such package), not a failure
+                        if response.status == 404:
+                            logger.debug("No such package at %s", url)
+                        else:
+                            logger.warning("API request failed for %s with status %s", url, response.status)
+                            _request_failed.set(True)
                         return None
-            except Exception as e:
-                print(f"Warning: API request error for {url}: {e}")
-                return None
+                except (aiohttp.ClientConnectionError, aiohttp.ClientPayloadError, asyncio.TimeoutError) as e:
+                    error = e  # Transient: dropped connection or timeout, worth retrying
+                except Exception as e:
+                    logger.warning("API request error for %s: %s", url, e)
+                    _request_failed.set(True)
+                    return None
+        logger.warning("API request error for %s after %d attempts: %r", url, API_RETRIES + 1, error)
+        _request_failed.set(True)
+        return None
+
+    async def download(self, url: str, dest: Path) -> bool:
+        """Streams a (potentially large) response body to a local file."""
+        try:
+            if not self._session or self._session.closed:
+                logger.warning("Session is closed. Cannot download %s.", url)
+                return False
+            # Archives can take far longer than the API timeout; only bound stalls
+            timeout = aiohttp.ClientTimeout(total=None, sock_connect=5, sock_read=60)
+            async with self._session.get(url, timeout=timeout) as response:
+                if response.status != 200:
+                    logger.warning("Download failed for %s with status %s", url, response.status)
+                    return False
+                with open(dest, 'wb') as f:
+                    async for chunk in response.content.iter_chunked(1 << 16):
+                        f.write(chunk)
+            return True
+        except Exception as e:
+            logger.warning("Download error for %s: %s", url, e)
+            return False
+
+    async def get_info(self, dep_type: str, name: str) -> Tuple[str, str]:
+        """Fetch license and URL for a dependency, querying each package only once.
+
+        Concurrent requests for the same package await the first caller's lookup.
+        """
+        key = _lookup_key(dep_type, name)
+        future = self._cache.get(key)
+        if future is not None:
+            return await asyncio.shield(future)
+
+        future = asyncio.get_running_loop().create_future()
+        self._cache[key] = future
+        _request_failed.set(False)
+        try:
+            result = await self.fetchers[dep_type](name)
+        except BaseException as e:
+            # Let the next caller retry rather than inheriting this failure
+            del self._cache[key]
+            if isinstance(e, asyncio.CancelledError):
+                future.cancel()
+            else:
+                future.set_exception(e)
+                future.exception()  # Mark retrieved; waiters still see it
+            raise
+        future.set_result(result)
+        # "Unknown" is remembered too (for less time) if the registry really had
+        # nothing, so missing or private packages aren't re-queried on every run
+        if result[0] != "Unknown" or not _request_failed.get():
+            self._fetched[key] = result
+        return result
 
     async def get_python_info(self, name: str) -> Tuple[str, str]:
         """Fetch license and URL for a Python package."""
-        data = await self._get(f"https://pypi.org/pypi/{name}/json")
+        data = await self._get(f"https://pypi.org/pypi/{name}/json", "pypi")
         if data and isinstance(data.get("info"), dict):
             info = data["info"]
-            license_str = info.get("license") or "Unknown"
-            if not license_str or license_str == "Unknown":
+            # PEP 639 metadata carries an SPDX expression; older uploads a free-form field
+            # Stripped first, so a name with a trailing newline isn't mistaken for license text
+            license_str = (info.get("license_expression") or info.get("license") or "").strip() or "Unknown"
+            if len(license_str) > LICENSE_NAME_MAX_CHARS or '\n' in license_str:
+                # Some packages paste the whole license text into the field
+                license_str = classify_license_text(license_str)
+            # Unrecognised pasted text ("Custom") still defers to a classifier naming the license
+            if license_str in ("", "Unknown", "Custom"):
                  for c in info.get("classifiers", []):
                      if c.startswith("License ::"):
                          license_str = c.split("::")[-1].strip()
@@ -273,7 +887,7 @@ class APIClient:
 
     async def get_js_info(self, name: str) -> Tuple[str, str]:
         """Fetch license and URL for a JavaScript package."""
-        data = await self._get(f"https://registry.npmjs.org/{name}")
+        data = await self._get(f"https://registry.npmjs.org/{name}", "npm")
         if data:
             license_str = data.get("license", "Unknown")
             if isinstance(license_str, dict):
@@ -293,7 +907,7 @@ class APIClient:
         if ":" not in name:
             return "Unknown", ""
         group, artifact = name.split(":")
-        data = await self._get(f"https://search.maven.org/solrsearch/select?q=g:\"{group}\"+AND+a:\"{artifact}\"&wt=json")
+        data = await self._get(f"https://search.maven.org/solrsearch/select?q=g:\"{group}\"+AND+a:\"{artifact}\"&wt=json", "maven")
 
         if data and isinstance(data.get("response"), dict):
             response = data["response"]
@@ -303,14 +917,76 @@ class APIClient:
                     return "See URL", doc.get("homepage") or f"https://mvnrepository.com/artifact/{group}/{artifact}"
         return "Unknown", ""
 
+    async def get_java_info_batch(self, names: List[str]) -> Dict[str, Tuple[str, str]]:
+        """Fetch license and URL for many Java packages with OR-ed Maven Central queries.
+
+        Only packages found by the search are returned; callers fall back to
+        get_java_info for the rest.
+        """
+        coords = {}
+        for name in names:
+            if name.count(":") == 1:
+                coords[tuple(name.split(":"))] = name
+
+        # Pack the URL-encoded clauses into batches bounded by count and query length
+        separator = quote(" OR ")
+        batches: List[List[str]] = []
+        length = 0
+        for group, artifact in coords:
+            clause = quote(f'(g:"{group}" AND a:"{artifact}")')
+            if len(clause) > MAVEN_QUERY_MAX_CHARS:
+                continue  # Left to the per-package lookup
+            if not batches or len(batches[-1]) == MAVEN_BATCH_SIZE or length + len(separator) + len(clause) > MAVEN_QUERY_MAX_CHARS:
+                batches.append([])
+                length = -len(separator)
+            batches[-1].append(clause)
+            length += len(separator) + len(clause)
+
+        responses = await asyncio.gather(*(
+            self._get(f"https://search.maven.org/solrsearch/select?q={separator.join(batch)}&rows={len(batch)}&wt=json", "maven")
+            for batch in batches
+        ))
+        results = {}
+        for data in responses:
+            if not (data and isinstance(data.get("response"), dict)):
+                continue
+            docs = data["response"].get("docs")
+            for doc in docs if isinstance(docs, list) else []:
+                if not isinstance(doc, dict):
+                    continue
+                group, artifact = doc.get("g"), doc.get("a")
+                name = coords.get((group, artifact))
+                if name:
+                    results[name] = ("See URL", doc.get("homepage") or f"https://mvnrepository.com/artifact/{group}/{artifact}")
+        return results
+
+    async def prefetch_java(self, names: List[str]):
+        """Seeds the lookup cache with batched Maven Central results."""
+        pending = [name for name in names if _lookup_key("java", name) not in self._cache]
+        if not pending:
+            return
+        loop = asyncio.get_running_loop()
+        for name, result in (await self.get_java_info_batch(pending)).items():
+            key = _lookup_key("java", name)
+            if key not in self._cache:
+                future = loop.create_future()
+                future.set_result(result)
+                self._cache[key] = future
+                self._fetched[key] = result
+
     async def get_dotnet_info(self, name: str) -> Tuple[str, str]:
         """Fetch license and URL for a .NET package."""
-        data = await self._get(f"https://api.nuget.org/v3/registration5-semver1/{name.lower()}/index.json")
+        # The gzip hive is a fraction of the size on the wire (aiohttp inflates it), and the
+        # SemVer 2.0.0 hive also lists packages whose versions the semver1 hive omits
+        data = await self._get(f"https://api.nuget.org/v3/registration5-gz-semver2/{name.lower()}/index.json", "nuget")
 
         if not (data and isinstance(data.get("items"), list) and data["items"]):
             return "Unknown", ""
 
         latest_page = data["items"][-1]
+        if isinstance(latest_page, dict) and "items" not in latest_page and latest_page.get("@id"):
+            # Packages with many versions get their pages linked rather than inlined
+            latest_page = await self._get(latest_page["@id"], "nuget") or {}
         if not (isinstance(latest_page, dict) and isinstance(latest_page.get("items"), list) and latest_page["items"]):
             return "Unknown", ""
 
@@ -318,108 +994,327 @@ class APIClient:
         if not (isinstance(latest_entry_summary, dict) and isinstance(latest_entry_summary.get("catalogEntry"), dict)):
             return "Unknown", ""
 
-        catalog_entry_ref = latest_entry_summary["catalogEntry"]
-        latest_entry_url = catalog_entry_ref.get("@id")
-
-        if not latest_entry_url:
-            return "Unknown", ""
-
-        entry_data = await self._get(latest_entry_url)
+        # The registration leaf inlines the catalog entry's metadata, so the
+        # separate catalog document is only needed if that is missing
+        entry_data = latest_entry_summary["catalogEntry"]
+        if not any(field in entry_data for field in _NUGET_INLINE_FIELDS):
+            latest_entry_url = entry_data.get("@id")
+            if not latest_entry_url:
+                return "Unknown", ""
+            entry_data = await self._get(latest_entry_url, "nuget")
         if entry_data:
-            return entry_data.get("licenseExpression", "Unknown"), entry_data.get("projectUrl", "")
+            license_name = (entry_data.get("licenseExpression")
+                            or classify_license_url(entry_data.get("licenseUrl") or "")
+                            or "Unknown")
+            return license_name, entry_data.get("projectUrl", "")
 
         return "Unknown", ""
 
 
-# --- Core Analysis Logic ---
+# --- Repository Scan Cache ---
 
-async def clone_repo(repo_url: str, target_dir: Path) -> bool:
-    """Clones a repository using the git command line."""
-    if target_dir.exists():
-        return True
-    target_dir.mkdir(parents=True, exist_ok=True)
-    process = await asyncio.create_subprocess_exec(
-        "git", "clone", "--depth=1", repo_url, str(target_dir),
-        stderr=asyncio.subprocess.PIPE
-    )
-    _, stderr = await process.communicate()
-    if process.returncode != 0:
-        print(f"Error cloning {repo_url}: {stderr.decode().strip()}")
-        return False
-    return True
+class RepoScanCache:
+    """Scan results from previous runs, reused while a repository's HEAD is unchanged.
 
-async def analyze_repository(repo_url: str, work_dir: Path, client: APIClient, dependency_map: Dict) -> RepoReport:
-    """Analyzes a single repository from cloning to dependency analysis."""
-    repo_name = repo_url.split('/')[-1]
-    repo_path = work_dir / repo_name
-    report = RepoReport(url=repo_url, name=repo_name)
+    A result holds the repository types, license, description and the parsed
+    dependencies of each type, i.e. everything that otherwise needs a clone.
+    """
 
-    print(f"[{repo_name}] Cloning...")
-    if not await clone_repo(repo_url, repo_path):
-        raise RuntimeError(f"Failed to clone {repo_url}")
+    def __init__(self, cache_file: Optional[str] = CACHE_FILE):
+        self.cache_file = cache_file
+        # url -> (HEAD sha, serialized result)
+        self._entries: Dict[str, Tuple[str, str]] = {}
+        # urls whose entry was used or replaced this run, for the LRU timestamps
+        self._touched: Set[str] = set()
 
-    print(f"[{repo_name}] Analyzing files...")
-    report.license = identify_repo_license(repo_path)
-    report.types = determine_repo_types(repo_path)
-    report.description = extract_repo_description(repo_path)
+    def load(self):
+        if not self.cache_file:
+            return
+        try:
+            with closing(sqlite3.connect(self.cache_file)) as conn, conn:
+                conn.execute(
+                    "CREATE TABLE IF NOT EXISTS repo_scans (url TEXT PRIMARY KEY, sha TEXT, result TEXT, ts INTEGER)"
+                )
+                rows = conn.execute("SELECT url, sha, result FROM repo_scans").fetchall()
+        except sqlite3.Error as e:
+            print(f"Warning: Could not read cache `{self.cache_file}`: {e}")
+            return
+        self._entries = {url: (sha, result) for url, sha, result in rows}
+
+    def get(self, url: str, sha: str) -> Optional[Dict[str, Any]]:
+        entry = self._entries.get(url)
+        if not entry or entry[0] != sha:
+            return None
+        result = _json_loads(entry[1])
+        if result.get("version") != SCAN_CACHE_VERSION:
+            return None
+        self._touched.add(url)
+        return result
+
+    def put(self, url: str, sha: str, result: Dict[str, Any]):
+        self._entries[url] = (sha, json.dumps({**result, "version": SCAN_CACHE_VERSION}))
+        self._touched.add(url)
+
+    def save(self):
+        """Writes entries used this run, then evicts the least recently used beyond the cap."""
+        if not self.cache_file or not self._touched:
+            return
+        now = int(time.time())
+        try:
+            with closing(sqlite3.connect(self.cache_file)) as conn, conn:
+                conn.executemany(
+                    "INSERT OR REPLACE INTO repo_scans (url, sha, result, ts) VALUES (?, ?, ?, ?)",
+                    [(url, *self._entries[url], now) for url in self._touched]
+                )
+                conn.execute(
+                    "DELETE FROM repo_scans WHERE url NOT IN "
+                    "(SELECT url FROM repo_scans ORDER BY ts DESC LIMIT ?)",
+                    (REPO_CACHE_MAX_ENTRIES,)
+                )
+        except sqlite3.Error as e:
+            print(f"Warning: Could not write cache `{self.cache_file}`: {e}")
 
-    parsers = {
-        'python': parse_python_deps,
-        'javascript': parse_js_deps,
-        'java': parse_java_deps,
-        'dotnet': parse_dotnet_deps,
-    }
 
-    all_deps: Dict[Tuple[str, str], str] = {}
-    for dep_type in report.types:
-        parsed_deps = parsers[dep_type](repo_path)
-        for name, version in parsed_deps.items():
-            all_deps[(dep_type, name)] = version
+# --- Core Analysis Logic ---
 
-    tasks = []
-    print(f"[{repo_name}] Found {len(all_deps)} unique dependencies. Fetching info...")
+def _skip_rejected_member(member: tarfile.TarInfo, dest_path: str) -> Optional[tarfile.TarInfo]:
+    """The 'data' extraction filter, but a member it rejects (e.g. an absolute
+    symlink) is skipped rather than aborting the whole extraction."""
+    try:
+        return tarfile.data_filter(member, dest_path)
+    except tarfile.FilterError:
+        return None
+
+def _extract_tarball(archive: Path, target_dir: Path, spill_dir: Optional[Path] = None) -> Path:
+    """Extracts a GitHub tarball into target_dir, dropping its `<repo>-<sha>/` top folder.
+
+    If the unpacked size is too large for target_dir's RAM disk, the tarball is
+    extracted into a directory of the same name under spill_dir instead. Returns
+    the directory it was extracted into.
+    """
+    with tarfile.open(archive, 'r:gz') as tar:
+        members = []
+        for member in tar.getmembers():
+            _, _, relative = member.name.partition('/')
+            if relative:
+                member.name = relative
+                members.append(member)
+        if spill_dir:
+            size = sum(m.size for m in members)
+            if size > min(RAMDISK_MAX_REPO_BYTES, shutil.disk_usage(target_dir).free // 2):
+                target_dir.rmdir()
+                target_dir = spill_dir / target_dir.name
+                target_dir.mkdir()
+        if hasattr(tarfile, 'data_filter'):
+            tar.extractall(target_dir, members=members, filter=_skip_rejected_member)
+        else:
+            tar.extractall(target_dir, members=[
+                m for m in members
+                if not (os.path.isabs(m.name) or '..' in Path(m.name).parts or m.islnk() or m.issym())
+            ])
+    return target_dir
+
+async def download_github_tarball(
+    repo_url: str, target_dir: Path, client: APIClient, spill_dir: Optional[Path] = None
+) -> Optional[Path]:
+    """Fetches a GitHub repository's default branch as a tarball over the shared session.
+
+    Returns the directory it was extracted into (see _extract_tarball), or None.
+    """
+    match = _RE_GITHUB_REPO.match(repo_url)
+    if not match:
+        return None
+    archive = target_dir.with_name(target_dir.name + ".tar.gz")
+    try:
+        if not await client.download(GITHUB_TARBALL_URL.format(owner=match.group(1), repo=match.group(2)), archive):
+            return None
+        return await asyncio.to_thread(_extract_tarball, archive, target_dir, spill_dir)
+    except Exception as e:
+        print(f"Warning: Could not extract tarball for {repo_url}: {e}")
+        return None
+    finally:
+        archive.unlink(missing_ok=True)
 
-    deps_by_type_count = {t: 0 for t in report.types}
+@lru_cache(maxsize=None)
+def _git_clone_command() -> Tuple[str, ...]:
+    """Returns the leanest `git clone` invocation the installed git supports."""
+    command = ("git", "clone", "--depth=1", "--single-branch", "--no-tags")
+    try:
+        version = subprocess.run(["git", "--version"], capture_output=True, text=True, check=True).stdout
+    except (OSError, subprocess.CalledProcessError):
+        return command
+    match = re.search(r'(\d+)\.(\d+)', version)
+    if match and tuple(map(int, match.groups())) >= GIT_PARTIAL_CLONE_VERSION:
+        # Blobless: only the blobs HEAD's checkout needs are fetched, not the whole pack
+        command = ("git", "-c", "protocol.version=2") + command[1:] + ("--filter=blob:none",)
+    return command
+
+# Fail fast on private repos instead of waiting on a credentials prompt
+_GIT_NO_PROMPT_ENV = {**os.environ, "GIT_TERMINAL_PROMPT": "0"}
+
+async def _run_git(*args: str, stdin: Optional[bytes] = None, env: Optional[Dict[str, str]] = None) -> Tuple[int, bytes, bytes]:
+    process = await asyncio.create_subprocess_exec(
+        *args,
+        stdin=asyncio.subprocess.PIPE if stdin is not None else None,
+        stdout=asyncio.subprocess.PIPE,
+        stderr=asyncio.subprocess.PIPE,
+        env=env
+    )
+    stdout, stderr = await process.communicate(stdin)
+    return process.returncode, stdout, stderr
 
-    for (dep_type, name), version in all_deps.items():
-        if deps_by_type_count.get(dep_type, 0) >= API_CALL_LIMIT_PER_TYPE.get(dep_type, 25):
-            continue
+async def remote_head(repo_url: str) -> Optional[str]:
+    """Resolves the commit a remote's HEAD points at, without fetching anything."""
+    try:
+        returncode, stdout, _ = await _run_git("git", "ls-remote", repo_url, "HEAD", env=_GIT_NO_PROMPT_ENV)
+    except OSError:
+        return None
+    sha, _, _ = stdout.decode().partition('\t')
+    return sha if returncode == 0 and sha else None
+
+async def git_fetch_index(repo_url: str, target_dir: Path) -> Optional[RepoIndex]:
+    """Clones without a checkout and materializes only the files the parsers read.
+
+    The index comes from `git ls-tree`, and the bucketed files are streamed out
+    of the object store by a single `git cat-file --batch` process.
+    """
+    returncode, _, stderr = await _run_git(*_git_clone_command(), "--no-checkout", repo_url, str(target_dir))
+    if returncode != 0:
+        print(f"Error cloning {repo_url}: {stderr.decode().strip()}")
+        return None
+    git_dir = str(target_dir / ".git")
+    returncode, tree, stderr = await _run_git("git", "--git-dir", git_dir, "ls-tree", "-r", "-z", "--full-tree", "HEAD")
+    if returncode != 0:
+        print(f"Error listing {repo_url}: {stderr.decode().strip()}")
+        return None
+    index, blobs = await asyncio.to_thread(index_git_tree, target_dir, tree)
+    if blobs:
+        paths = list(blobs)
+        if "--filter=blob:none" in _git_clone_command():
+            # Otherwise cat-file lazily fetches each missing blob in its own round trip.
+            # On failure (e.g. git < 2.29 has no fetch --stdin) it still does, just slower.
+            await _run_git(
+                "git", "--git-dir", git_dir, "-c", "fetch.negotiationAlgorithm=noop", "fetch", "origin",
+                "--no-tags", "--no-write-fetch-head", "--recurse-submodules=no", "--filter=blob:none", "--stdin",
+                stdin="".join(f"{oid}\n" for oid in dict.fromkeys(blobs.values())).encode(), env=_GIT_NO_PROMPT_ENV
+            )
+        request = "".join(f"{blobs[p]}\n" for p in paths).encode()
+        returncode, contents, stderr = await _run_git("git", "--git-dir", git_dir, "cat-file", "--batch", stdin=request)
+        if returncode != 0:
+            print(f"Error reading {repo_url}: {stderr.decode().strip()}")
+            return None
+        await asyncio.to_thread(_write_blobs, contents, paths)
+    return index
+
+async def clone_repo(
+    repo_url: str, target_dir: Path, client: APIClient, spill_dir: Optional[Path] = None
+) -> Optional[Tuple[Path, RepoIndex]]:
+    """Fetches a repository, via tarball for GitHub and git otherwise.
+
+    Returns the checkout directory, which is under spill_dir for tarballs too
+    large for a RAM disk, and its scan index; None if it could not be fetched.
+    """
+    target_dir.mkdir(parents=True, exist_ok=True)
+    extracted = await download_github_tarball(repo_url, target_dir, client, spill_dir)
+    if extracted:
+        # File scanning is blocking I/O, so keep it off the event loop thread
+        return extracted, await asyncio.to_thread(scan_repo, extracted)
+    # Private repos or extraction failures: start clean and let git handle it
+    for path in (target_dir, spill_dir / target_dir.name if spill_dir else None):
+        if path:
+            shutil.rmtree(path, ignore_errors=True)
+    index = await git_fetch_index(repo_url, target_dir)
+    return (target_dir, index) if index else None
+
+async def analyze_repository(
+    repo_url: str, work_dir: Path, client: APIClient, dependency_map: Dict[str, MappingEntry],
+    scan_cache: Optional[RepoScanCache] = None, checkout_slots: Optional[asyncio.Semaphore] = None,
+    spill_dir: Optional[Path] = None
+) -> RepoReport:
+    """Analyzes a single repository from cloning to dependency analysis.
+
+    With a scan_cache, a repository whose HEAD is unchanged since it was last
+    scanned is not fetched again; only its dependency lookups are redone.
+    checkout_slots bounds the fetch-and-parse stage only, so the next
+    repository can be cloning while this one's registry lookups run.
+    When work_dir is a RAM disk, spill_dir takes checkouts too large for it.
+    """
+    match = _RE_REPO_NAME.search(repo_url)
+    if not match:
+        raise ValueError(f"Cannot derive a repository name from {repo_url}")
+    repo_name = match.group(1)
+    report = RepoReport(url=repo_url, name=repo_name)
 
-        map_key = f"{dep_type}:{name.lower()}"
-        if map_key in dependency_map:
-            mapped_data = dependency_map[map_key]
-            dep = Dependency(
-                name=name,
-                version=mapped_data.get("version", version),
-                type=dep_type,
-                license=f"! {mapped_data.get('license', 'Unknown')}",
-                url=mapped_data.get('documentation_url', '')
+    async with checkout_slots or nullcontext():
+        head = await remote_head(repo_url) if scan_cache else None
+        cached = scan_cache.get(repo_url, head) if head else None
+        if cached:
+            print(f"[{repo_name}] Unchanged since last scan ({head[:12]}), reusing it.")
+            report.types, report.license, report.description = cached["types"], cached["license"], cached["description"]
+            parsed = cached["dependencies"]
+        else:
+            print(f"[{repo_name}] Cloning...")
+            # A directory of its own, so same-named repositories (a/utils, b/utils) never share a checkout
+            repo_path = Path(tempfile.mkdtemp(prefix=f"{repo_name}-", dir=work_dir))
+            checkout = await clone_repo(repo_url, repo_path, client, spill_dir)
+            if checkout is None:
+                raise RuntimeError(f"Failed to clone {repo_url}")
+
+            print(f"[{repo_name}] Analyzing files...")
+            repo_path, (report.types, files) = checkout
+
+            report.license, report.description, *parsed = await asyncio.gather(
+                asyncio.to_thread(identify_repo_license, files),
+                asyncio.to_thread(extract_repo_description, files),
+                *(asyncio.to_thread(parse_dependencies, dep_type, files) for dep_type in report.types)
             )
-            report.dependencies.append(dep)
+            # Everything needed from the checkout has been read; free the space now
+            # rather than holding every clone (possibly in RAM) until the run ends
+            await asyncio.to_thread(robust_rmtree, repo_path)
+            if head:
+                scan_cache.put(repo_url, head, {
+                    "types": report.types, "license": report.license,
+                    "description": report.description, "dependencies": parsed,
+                })
+
+    print(f"[{repo_name}] Found {sum(map(len, parsed))} unique dependencies. Fetching info...")
+
+    # One pass per type: mapped deps are resolved locally, the rest are capped
+    # at the per-type API limit before any lookup is scheduled
+    to_fetch: List[Tuple[str, str, str]] = []
+    for dep_type, parsed_deps in zip(report.types, parsed):
+        if not dependency_map:
+            # No mapping file, so there are no keys to build or look up
+            unmapped = [(name, version, dep_type) for name, version in parsed_deps.items()]
         else:
-            task_map = {
-                "python": client.get_python_info,
-                "javascript": client.get_js_info,
-                "java": client.get_java_info,
-                "dotnet": client.get_dotnet_info,
-            }
-            if dep_type in task_map:
-                tasks.append((name, version, dep_type, task_map[dep_type](name)))
-                deps_by_type_count[dep_type] = deps_by_type_count.get(dep_type, 0) + 1
-
-    results = await asyncio.gather(*(t[3] for t in tasks))
-    for i, res_tuple in enumerate(results):
+            unmapped = []
+            for name, version in parsed_deps.items():
+                mapped = dependency_map.get(mapping_key(dep_type, name))
+                if mapped:
+                    report.dependencies.append(Dependency(name, mapped.version or version, dep_type, mapped.license, mapped.url))
+                else:
+                    unmapped.append((name, version, dep_type))
+        if dep_type in client.fetchers:
+            # Sorted so the same packages make the cut on every run, whatever the manifest order
+            unmapped.sort(key=lambda dep: dep[0].lower())
+            to_fetch.extend(islice(unmapped, API_CALL_LIMIT_PER_TYPE.get(dep_type, 25)))
+
+    # Resolve Java packages in bulk first; the per-package lookups then hit the cache
+    java_names = [name for name, _, dep_type in to_fetch if dep_type == "java"]
+    if java_names:
+        await client.prefetch_java(java_names)
+
+    results = await asyncio.gather(*(client.get_info(dep_type, name) for name, _, dep_type in to_fetch))
+    for (name, version, dep_type), res_tuple in zip(to_fetch, results):
         try:
-            name, version, dep_type, _ = tasks[i]
             if isinstance(res_tuple, tuple) and len(res_tuple) == 2:
                 license_str, url = res_tuple
                 report.dependencies.append(Dependency(name, version, dep_type, license_str, url))
             else:
                 report.dependencies.append(Dependency(name, version, dep_type, "Lookup Failed", ""))
-                print(f"Warning: Could not process result for {dep_type} dependency '{name}'. Result: {res_tuple}")
+                logger.warning("Could not process result for %s dependency '%s'. Result: %s", dep_type, name, res_tuple)
         except Exception as e:
-            print(f"Error processing dependency result: {tasks[i][:3]}. Error: {e}")
-
+            logger.error("Error processing dependency result: %s. Error: %s", (name, version, dep_type), e)
 
     print(f"[{repo_name}] Analysis complete.")
     return report
@@ -427,67 +1322,106 @@ async def analyze_repository(repo_url: str, work_dir: Path, client: APIClient, d
 
 # --- Report Generation ---
 
-def write_csv_report(reports: List[RepoReport], filename: str):
-    """Writes the final analysis to a CSV file."""
-    with open(filename, 'w', newline='', encoding='utf-8') as f:
-        writer = csv.writer(f)
-        writer.writerow(['Repository', 'Repo License', 'Dependency', 'Dependency Type', 'Version', 'Dependency License', 'URL'])
-        for report in reports:
-            if not report.dependencies:
-                writer.writerow([report.url, report.license, 'N/A', 'N/A', 'N/A', 'N/A', 'N/A'])
-            else:
-                for dep in report.dependencies:
-                    writer.writerow([report.url, report.license, dep.name, dep.type, dep.version, dep.license, dep.url])
-    print(f"CSV report written to {filename}")
+_NO_DEPENDENCIES_ROW = ['N/A', 'N/A', 'N/A', 'N/A', 'N/A']
+
+class CsvReportWriter:
+    """Streams CSV rows as each repository finishes, so partial results survive a crash.
+
+    The file is only created once the first report arrives.
+    """
+
+    def __init__(self, filename: str):
+        self.filename = filename
+        self._file = None
+        self._writer = None
+
+    def __enter__(self) -> "CsvReportWriter":
+        return self
+
+    def __exit__(self, *exc_info):
+        if self._file:
+            self._file.close()
+            print(f"CSV report written to {self.filename}")
+
+    def write(self, report: RepoReport):
+        if self._writer is None:
+            self._file = open(self.filename, 'w', newline='', encoding='utf-8', buffering=REPORT_BUFFER_SIZE)
+            self._writer = csv.writer(self._file)
+            self._writer.writerow(['Repository', 'Repo License', 'Dependency', 'Dependency Type', 'Version', 'Dependency License', 'URL'])
+        self._writer.writerows(
+            [report.url, report.license, dep.name, dep.type, dep.version, dep.license, dep.url]
+            if dep else [report.url, report.license, *_NO_DEPENDENCIES_ROW]
+            for dep in (report.dependencies or [None])
+        )
+        # One flush per repository; each one took seconds to analyze, so this is cheap
+        self._file.flush()
 
 def write_md_report(reports: List[RepoReport], filename: str):
     """Writes the final analysis to a Markdown file."""
-    with open(filename, 'w', encoding='utf-8') as f:
+    with open(filename, 'w', encoding='utf-8', buffering=REPORT_BUFFER_SIZE) as f:
         f.write(f"# Repository Dependency Report\n\n_Generated on {time.ctime()}_\n\n")
         f.write("_Licenses marked with `!` are from the manual `dependency_mapping.csv` file._\n\n")
 
         for report in reports:
-            f.write(f"## [{report.name}]({report.url})\n\n")
-            f.write(f"* **License**: {report.license}\n")
-            f.write(f"* **Detected Types**: {', '.join(report.types) or 'None'}\n")
-            f.write(f"* **Description**: {report.description}\n\n")
+            # Build each repository's section in memory and write it in one call
+            lines = [
+                f"## [{report.name}]({report.url})\n\n",
+                f"* **License**: {report.license}\n",
+                f"* **Detected Types**: {', '.join(report.types) or 'None'}\n",
+                f"* **Description**: {report.description}\n\n",
+            ]
 
             if report.dependencies:
-                f.write("| Dependency | Type | Version | License | Documentation |\n")
-                f.write("|------------|------|---------|---------|---------------|\n")
+                lines.append("| Dependency | Type | Version | License | Documentation |\n")
+                lines.append("|------------|------|---------|---------|---------------|\n")
                 # Sort dependencies for consistent output
-                sorted_deps = sorted(report.dependencies, key=lambda d: (d.type, d.name))
-                for dep in sorted_deps:
+                for dep in sorted(report.dependencies, key=lambda d: (d.type, d.name)):
                     url_link = f"[Link]({dep.url})" if dep.url else "N/A"
-                    f.write(f"| {dep.name} | {dep.type} | {dep.version} | {dep.license} | {url_link} |\n")
-                f.write("\n")
+                    lines.append(f"| {dep.name} | {dep.type} | {dep.version} | {dep.license} | {url_link} |\n")
+                lines.append("\n")
             else:
-                f.write("_No dependencies found or parsed._\n\n")
-            f.write("---\n\n")
+                lines.append("_No dependencies found or parsed._\n\n")
+            lines.append("---\n\n")
+            f.write("".join(lines))
     print(f"Markdown report written to {filename}")
 
+# Licenses that mean the registries gave no usable answer
+_MISSING_LICENSES = frozenset({"Unknown", "See URL", "", "Lookup Failed"})
+
 def write_missing_mapping_report(reports: List[RepoReport], filename: str):
     """Generates a CSV for dependencies with missing information."""
-    unknown_deps: Dict[Tuple[str, str], Dependency] = {}
-    for report in reports:
-        for dep in report.dependencies:
-            is_unknown = dep.license in ["Unknown", "See URL", "", "Lookup Failed"] or not dep.url
-            is_mapped = dep.license.startswith("!")
-            if is_unknown and not is_mapped:
-                unknown_deps[(dep.type, dep.name)] = dep
+    # Mapped licenses start with "!"; those are never reported, even without a URL
+    unknown_deps: Dict[Tuple[str, str], Dependency] = {
+        (dep.type, dep.name): dep
+        for report in reports
+        for dep in report.dependencies
+        if (dep.license in _MISSING_LICENSES or not dep.url) and not dep.license.startswith("!")
+    }
 
     if not unknown_deps:
         print("No dependencies with missing information found.")
         return
 
-    with open(filename, 'w', newline='', encoding='utf-8') as f:
+    with open(filename, 'w', newline='', encoding='utf-8', buffering=REPORT_BUFFER_SIZE) as f:
         writer = csv.writer(f)
         writer.writerow(['dependency_name', 'dependency_type', 'version', 'license', 'documentation_url'])
-        for dep in sorted(unknown_deps.values(), key=lambda d: (d.type, d.name)):
-             writer.writerow([dep.name, dep.type, dep.version, '', ''])
+        writer.writerows(
+            [dep.name, dep.type, dep.version, '', '']
+            for dep in sorted(unknown_deps.values(), key=lambda d: (d.type, d.name))
+        )
     print(f"Found {len(unknown_deps)} dependencies with missing info.")
     print(f"Generated a template at `{filename}`. You can fill it out and rename it to `{MAPPING_FILE}` for the next run.")
 
+def write_error_log(failures: List[Tuple[str, BaseException]], filename: str):
+    """Writes the tracebacks of failed repositories to a log file in one go."""
+    entries = [
+        f"--- {url} ---\n" + "".join(traceback.format_exception(type(exc), exc, exc.__traceback__))
+        for url, exc in failures
+    ]
+    with open(filename, 'w', encoding='utf-8') as f:
+        f.write("\n".join(entries))
+    print(f"Error details written to {filename}")
+
 
 # --- Main Application ---
 
@@ -500,8 +1434,12 @@ def load_repositories(filename: str) -> List[str]:
     with open(filename, 'r') as f:
         return [line.strip() for line in f if line.strip() and not line.startswith('#')]
 
-def load_dependency_mapping(filename: str) -> Dict:
-    """Loads the manual dependency mapping file."""
+def load_dependency_mapping(filename: str) -> Dict[str, MappingEntry]:
+    """Loads the manual dependency mapping file.
+
+    Keys are "type:name" in lower case. Entries are built once here, so applying
+    an override to each matching dependency is a plain attribute copy.
+    """
     if not Path(filename).exists():
         return {}
 
@@ -510,24 +1448,44 @@ def load_dependency_mapping(filename: str) -> Dict:
         with open(filename, 'r', encoding='utf-8') as f:
             reader = csv.DictReader(f)
             for row in reader:
-                key = f"{row['dependency_type'].lower()}:{row['dependency_name'].lower()}"
-                mapping[key] = row
+                mapping[mapping_key(row['dependency_type'], row['dependency_name'])] = MappingEntry(
+                    version=row.get('version') or '',  # Blank: keep the version found in the repo
+                    license=f"! {row.get('license') or 'Unknown'}",
+                    url=row.get('documentation_url') or '',
+                )
         print(f"Loaded {len(mapping)} entries from `{filename}`")
     except Exception as e:
         print(f"Warning: Could not load `{filename}`: {e}")
     return mapping
 
-def robust_rmtree(path: Path, max_retries=5, delay=2):
-    """Robustly removes a directory tree, retrying on PermissionError."""
-    for i in range(max_retries):
+def ramdisk_dir() -> Optional[str]:
+    """Returns a writable tmpfs directory with enough free space, or None."""
+    if not USE_RAMDISK or not hasattr(os, "getuid"):
+        return None
+    for candidate in ("/dev/shm", f"/run/user/{os.getuid()}"):
         try:
-            shutil.rmtree(path)
-            return
-        except PermissionError:
-            print(f"Warning: PermissionError removing {path}. Retrying in {delay}s ({i+1}/{max_retries})...")
-            time.sleep(delay)
-    print(f"Error: Failed to remove directory after {max_retries} retries.")
-    print(f"Please manually delete the folder: {path.resolve()}")
+            if os.access(candidate, os.W_OK) and shutil.disk_usage(candidate).free >= RAMDISK_MIN_FREE_BYTES:
+                return candidate
+        except OSError:
+            continue
+    return None
+
+def _force_remove(func, path, _exc):
+    """rmtree error handler: clears the read-only bit (git objects on Windows) and retries that path."""
+    try:
+        os.chmod(path, stat.S_IWRITE)
+        func(path)
+    except OSError as e:
+        print(f"Warning: Could not remove {path}: {e}")
+
+def robust_rmtree(path: Path):
+    """Removes a directory tree in one pass, fixing read-only files as they're hit."""
+    if sys.version_info >= (3, 12):
+        shutil.rmtree(path, onexc=_force_remove)
+    else:
+        shutil.rmtree(path, onerror=_force_remove)
+    if path.exists():
+        print(f"Please manually delete the folder: {path.resolve()}")
 
 
 async def main():
@@ -537,7 +1495,12 @@ async def main():
         return
 
     dependency_map = load_dependency_mapping(MAPPING_FILE)
-    temp_dir = Path(tempfile.mkdtemp(prefix="repo_analyzer_"))
+    scan_cache = RepoScanCache()
+    scan_cache.load()
+    ramdisk = ramdisk_dir()
+    temp_dir = Path(tempfile.mkdtemp(prefix="repo_analyzer_", dir=ramdisk))
+    # Repositories too large for the RAM disk are extracted on disk instead
+    spill_dir = Path(tempfile.mkdtemp(prefix="repo_analyzer_")) if ramdisk else None
     print(f"Using temporary directory for this run: {temp_dir}")
 
     successful_reports = []
@@ -548,29 +1511,38 @@ async def main():
         api_semaphore = asyncio.Semaphore(MAX_CONCURRENT_API_CALLS)
 
         async with APIClient(api_semaphore) as client:
-            async def constrained_analyzer(repo_url: str):
-                async with repo_semaphore:
-                    return await analyze_repository(repo_url, temp_dir, client, dependency_map)
-
-            tasks = [constrained_analyzer(url) for url in repos]
-            results = await asyncio.gather(*tasks, return_exceptions=True)
-
-        for i, res in enumerate(results):
-            if isinstance(res, Exception):
-                print(f"--- ERROR: Analysis failed for {repos[i]} ---")
-                traceback.print_exception(type(res), res, res.__traceback__)
-                print("-" * 50)
-                failed_repos.append(repos[i])
-            else:
-                successful_reports.append(res)
+            async def constrained_analyzer(index: int, repo_url: str):
+                try:
+                    return index, await analyze_repository(
+                        repo_url, temp_dir, client, dependency_map, scan_cache, repo_semaphore, spill_dir
+                    )
+                except Exception as e:
+                    return index, e
+
+            tasks = [constrained_analyzer(i, url) for i, url in enumerate(repos)]
+            finished = []
+            with CsvReportWriter(CSV_REPORT_FILE) as csv_report:
+                for next_done in asyncio.as_completed(tasks):
+                    i, res = await next_done
+                    if isinstance(res, Exception):
+                        # Full tracebacks are formatted once, into ERROR_LOG_FILE, at the end
+                        print(f"ERROR: Analysis failed for {repos[i]}: {res!r}")
+                        failed_repos.append((repos[i], res))
+                    else:
+                        csv_report.write(res)
+                        finished.append((i, res))
+
+        # The CSV is in completion order; the remaining reports keep the input order
+        successful_reports = [report for _, report in sorted(finished, key=lambda item: item[0])]
 
     finally:
-        if temp_dir.exists():
-            robust_rmtree(temp_dir)
+        scan_cache.save()
+        for work_dir in (temp_dir, spill_dir):
+            if work_dir and work_dir.exists():
+                robust_rmtree(work_dir)
         print("-" * 20)
 
     if successful_reports:
-        write_csv_report(successful_reports, CSV_REPORT_FILE)
         write_md_report(successful_reports, MD_REPORT_FILE)
         write_missing_mapping_report(successful_reports, MISSING_MAPPING_FILE)
     else:
@@ -578,11 +1550,28 @@ async def main():
 
     if failed_repos:
         print("\nThe following repositories failed to process:")
-        for url in failed_repos:
+        for url, _ in failed_repos:
             print(f"- {url}")
+        write_error_log(failed_repos, ERROR_LOG_FILE)
 
     print("Done.")
 
 
 if __name__ == "__main__":
-    asyncio.run(main())
\ No newline at end of file
+    parser = argparse.ArgumentParser(description=f"Reports the dependencies and licenses of the repositories in `{REPOS_FILE}`.")
+    parser.add_argument("-v", "--verbose", action="store_true",
+                        help="also log packages a registry doesn't know (HTTP 404)")
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.DEBUG if args.verbose else logging.WARNING, format="%(levelname)s: %(message)s")
+
+    try:
+        import uvloop  # Optional, faster event loop (not available on Windows)
+    except ImportError:
+        asyncio.run(main())
+    else:
+        if hasattr(uvloop, "run"):
+            uvloop.run(main())
+        else:
+            # uvloop < 0.18 has no run(); install its loop through the event loop policy instead
+            asyncio.set_event_loop_policy(uvloop.EventLoopPolicy())
+            asyncio.run(main())
\ No newline at end of file
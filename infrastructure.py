@@ -1,49 +1,91 @@
 # infrastructure_analyzer_v15.py
 
+import argparse
 import asyncio
 import ast
+import hashlib
 import os
 import re
 import shutil
 import stat
+import sys
 import tempfile
 import time
 import json
+import multiprocessing
 import xml.etree.ElementTree as ET
 from collections import Counter
-from dataclasses import dataclass, field
+from concurrent.futures import Executor, ProcessPoolExecutor
+from dataclasses import asdict, dataclass, field
+from functools import lru_cache
 from pathlib import Path
-from typing import Dict, List, Literal, Set, Any
+from typing import Dict, List, Literal, Optional, Set, Tuple, Any
 
 try:
     import yaml
+    YAML_LOADER = getattr(yaml, "CSafeLoader", yaml.SafeLoader)  # libyaml's C loader when available
 except ImportError:
     yaml = None
 
+try:
+    import orjson
+    _json_loads = orjson.loads
+except ImportError:
+    _json_loads = json.loads
+
 # --- Configuration ---
 REPOS_FILE = "repos.txt"
 MD_REPORT_FILE = "infrastructure_report.md"
 AZURE_LICENSE_FILE = "azure.md" # Renamed for clarity
 MAX_CONCURRENT_REPOS = 5
+REPORT_CACHE_DIR = Path.home() / ".cache" / "infra-analyzer"  # One JSON file per analyzed (repository, HEAD sha)
+REPORT_CACHE_VERSION = 1  # Bump when the analysis changes so older cached reports are ignored
+REPORT_CACHE_MAX_ENTRIES = 500  # Least recently used reports beyond this count are deleted on save
+KEPT_CHECKOUTS_DIR = REPORT_CACHE_DIR / "checkouts"  # Work dir reused across runs with --keep
+ANALYSIS_BATCH_SIZE = 64  # Source files per process-pool task, to amortize the IPC round trip
 PROVIDER_KEYWORDS = ["azure", "aws", "gcp", "kubernetes", "cloudflare", "digitalocean", "azuread", "azure-native"]
 COSMOSDB_KEYWORDS = ["cosmosdb", "documentdb"]
 BLOBSTORAGE_KEYWORDS = ["storage.account", "storage.container", "storage.blob"]
+# Only files matching these are checked out (and, on servers allowing partial clones, downloaded)
+SPARSE_CHECKOUT_PATTERNS = ["*.py", "*.ts", "*.sh", "*.yml", "*.yaml", "*.csproj", "package.json"]
+EXCLUDED_DIRS = {"node_modules", ".venv", "target", "dist", "build", ".git"}
+
+# Compiled once at import rather than rebuilt for every file
+PROVIDER_RE = re.compile("|".join(map(re.escape, PROVIDER_KEYWORDS)))  # Any provider keyword, in one scan
+# A provider keyword inside a dotted name that is then called; files without one can't yield a resource, so skip ast.parse
+PY_PROVIDER_CALL_RE = re.compile(r"(?:{})\w*(?:\s*\.\s*\w+)*\s*\(".format("|".join(map(re.escape, PROVIDER_KEYWORDS))))
+COSMOSDB_RE = re.compile("|".join(map(re.escape, COSMOSDB_KEYWORDS)))
+BLOBSTORAGE_RE = re.compile("|".join(map(re.escape, BLOBSTORAGE_KEYWORDS)))
+TS_RESOURCE_RE = re.compile(r"new\s+((?:{})\.[\w\.<>]+)\s*\(\s*[\"']([^\"']+)[\"']".format("|".join(map(re.escape, PROVIDER_KEYWORDS))))
+TS_SKU_RE = re.compile(r"sku\s*:\s*[\"']([^\"']+)[\"']")
+TS_SKU_LOOKAHEAD = 200  # The sku is expected within this many characters of the constructor call
+SHELL_AZ_RE = re.compile(r"az\s+([a-z\s-]+?)\s+(create|blob\s+upload).*?(--name|-n|--container-name|-c)\s+(['\"]?)([\w\-\$]+)\4", re.IGNORECASE | re.DOTALL)
+# Byte-level gates: files failing them are never decoded
+PROVIDER_BYTES_RE = re.compile(PROVIDER_RE.pattern.encode())
+SHELL_AZ_BYTES_RE = re.compile(rb"az\s", re.IGNORECASE)
+BINARY_SNIFF_BYTES = 4096  # A NUL byte this early means the file isn't source code
 
 
 # --- Data Structures ---
-@dataclass(frozen=True, eq=True)
+@dataclass(frozen=True, eq=True, slots=True)
 class InfraResource:
     name: str; resource_type: str; language: Literal["Python", "TypeScript", "Shell", "GitHub Actions"]; source_file: str; size: str = "N/A"
 
-@dataclass
+@dataclass(slots=True)
 class ServiceInteraction:
     name: str; interaction_type: str; language: str; details: str
 
-@dataclass
+@dataclass(slots=True)
 class WorkflowSummary:
     name: str; path: str; triggers: str; job_names: List[str]
 
-@dataclass
+@dataclass(slots=True)
+class RepoFiles:
+    """The files of one repository that the analyzers read, gathered in a single walk."""
+    sources: List[Path] = field(default_factory=list); workflows: List[Path] = field(default_factory=list)
+    csproj: List[Path] = field(default_factory=list); package_json: List[Path] = field(default_factory=list)
+
+@dataclass(slots=True)
 class RepoReport:
     url: str; name: str
     resources: List[InfraResource] = field(default_factory=list)
@@ -53,67 +95,140 @@ class RepoReport:
 
 # --- Analysis Functions ---
 
-def analyze_python_file(file_path: Path, repo_root: Path) -> List[InfraResource]:
-    resources = []
+def read_source(file_path: Path, gate: re.Pattern) -> Optional[str]:
+    """Returns a file's text, or None for binaries and files the gate rules out."""
+    raw = file_path.read_bytes()
+    if raw.find(b"\0", 0, BINARY_SNIFF_BYTES) != -1 or not gate.search(raw): return None
+    return raw.decode('utf-8', errors='ignore')
+
+def _func_to_dotted(node: ast.expr):
+    """Returns the dotted name of a callee such as `azure.storage.Account`, or None if it isn't a plain name chain."""
+    parts = []
+    while isinstance(node, ast.Attribute): parts.append(node.attr); node = node.value
+    if not isinstance(node, ast.Name): return None
+    parts.append(node.id)
+    return ".".join(reversed(parts))
+
+class _ProviderCallCollector(ast.NodeVisitor):
+    """Collects `x = provider.Resource("name", sku=...)` assignments.
+
+    Assignments are statements, so only statement lists are followed; expression
+    subtrees, which hold most of a module's nodes, are never entered.
+    """
+    STATEMENT_FIELDS = ("body", "orelse", "finalbody", "handlers", "cases")
+
+    def __init__(self, rel_path: str): self.rel_path, self.resources = rel_path, []
+
+    def visit_Assign(self, node: ast.Assign):
+        if not isinstance(node.value, ast.Call): return
+        call, func_str = node.value, _func_to_dotted(node.value.func)
+        if func_str and "." in func_str and PROVIDER_RE.search(func_str):
+            if call.args and isinstance(call.args[0], ast.Constant):
+                name, size = call.args[0].value, "N/A"
+                for kw in call.keywords:
+                    if kw.arg == 'sku' and isinstance(kw.value, ast.Constant): size = kw.value.value; break
+                self.resources.append(InfraResource(name, func_str, "Python", self.rel_path, size))
+
+    def generic_visit(self, node: ast.AST):
+        for field_name in self.STATEMENT_FIELDS:
+            for child in getattr(node, field_name, ()): self.visit(child)
+
+def analyze_python_file(file_path: Path, rel_path: str) -> List[InfraResource]:
+    collector = _ProviderCallCollector(rel_path)
     try:
-        content = file_path.read_text(encoding='utf-8', errors='ignore')
-        if not any(provider in content for provider in PROVIDER_KEYWORDS): return []
-        tree = ast.parse(content)
-        for node in ast.walk(tree):
-            if not isinstance(node, ast.Assign) or not isinstance(node.value, ast.Call): continue
-            call, func_str = node.value, ast.unparse(node.value.func)
-            if "." in func_str and any(provider in func_str for provider in PROVIDER_KEYWORDS):
-                if call.args and isinstance(call.args[0], ast.Constant):
-                    name, size = call.args[0].value, "N/A"
-                    for kw in call.keywords:
-                        if kw.arg == 'sku' and isinstance(kw.value, ast.Constant): size = kw.value.value; break
-                    resources.append(InfraResource(name, func_str, "Python", str(file_path.relative_to(repo_root)), size))
+        content = read_source(file_path, PROVIDER_BYTES_RE)
+        if content is None or not PY_PROVIDER_CALL_RE.search(content): return []
+        collector.visit(ast.parse(content))
     except Exception as e: print(f"Warning: Could not parse Python file {file_path}: {e}")
-    return resources
+    return collector.resources
 
-def analyze_typescript_file(file_path: Path, repo_root: Path) -> List[InfraResource]:
+def analyze_typescript_file(file_path: Path, rel_path: str) -> List[InfraResource]:
     resources = []
     try:
-        content, provider_pattern = file_path.read_text(encoding='utf-8', errors='ignore'), "|".join(PROVIDER_KEYWORDS)
-        pattern = r"new\s+((?:{})\.[\w\.<>]+)\s*\(\s*[\"']([^\"']+)[\"']".format(provider_pattern)
-        for match in re.finditer(pattern, content):
+        content = read_source(file_path, PROVIDER_BYTES_RE)
+        if content is None: return []
+        for match in TS_RESOURCE_RE.finditer(content):
             resource_type, name = match.group(1), match.group(2)
-            search_area, size_match = content[match.end():match.end() + 200], re.search(r"sku\s*:\s*[\"']([^\"']+)[\"']", content[match.end():match.end() + 200])
+            size_match = TS_SKU_RE.search(content, match.end(), match.end() + TS_SKU_LOOKAHEAD)  # Bounded search, no slice copied
             size = size_match.group(1) if size_match else "N/A"
-            resources.append(InfraResource(name, resource_type, "TypeScript", str(file_path.relative_to(repo_root)), size))
+            resources.append(InfraResource(name, resource_type, "TypeScript", rel_path, size))
     except Exception as e: print(f"Warning: Could not parse TypeScript file {file_path}: {e}")
     return resources
 
 def analyze_shell_content(content: str, source_id: str, language: Literal["Shell", "GitHub Actions"]) -> List[InfraResource]:
-    resources, pattern = [], r"az\s+([a-z\s-]+?)\s+(create|blob\s+upload).*?(--name|-n|--container-name|-c)\s+(['\"]?)([\w\-\$]+)\4"
-    for match in re.finditer(pattern, content, re.IGNORECASE | re.DOTALL):
+    resources = []
+    for match in SHELL_AZ_RE.finditer(content):
         action, name = match.group(2), match.group(5)
         resource_type = f"az storage {action}" if "blob" in action else f"az {match.group(1).strip()} create"
         resources.append(InfraResource(name, resource_type, language, source_id))
     return resources
 
-def analyze_sdk_usage(repo_path: Path) -> Dict[str, List[ServiceInteraction]]:
-    interactions = {"Cosmos DB": [], "Blob Storage": []}
-    for csproj in repo_path.rglob("*.csproj"):
+def analyze_shell_file(file_path: Path, rel_path: str) -> List[InfraResource]:
+    content = read_source(file_path, SHELL_AZ_BYTES_RE)
+    return analyze_shell_content(content, rel_path, "Shell") if content is not None else []
+
+# File suffix -> analyzer(file_path, path relative to the repository), so each file is dispatched with a single lookup
+HANDLERS = {".py": analyze_python_file, ".ts": analyze_typescript_file, ".sh": analyze_shell_file}
+
+def iter_repo_files(root: Path):
+    """Yields every file under root, pruning EXCLUDED_DIRS instead of walking and filtering them."""
+    stack = [str(root)]
+    while stack:
+        # Unreadable directories and entries are skipped, as os.walk does, rather than failing the repo
+        try: entries = os.scandir(stack.pop())
+        except OSError: continue
+        with entries:
+            for entry in entries:
+                # DirEntry type checks use the d_type from the directory listing, not a stat() per path
+                try: is_dir = entry.is_dir(follow_symlinks=False); is_file = not is_dir and entry.is_file()
+                except OSError: continue
+                if is_dir:
+                    if entry.name not in EXCLUDED_DIRS: stack.append(entry.path)
+                elif is_file: yield Path(entry.path)
+
+def collect_repo_files(repo_path: Path) -> RepoFiles:
+    """Sorts a repository's files by the analyzer that reads them."""
+    files = RepoFiles()
+    for file_path in iter_repo_files(repo_path):
+        suffix = file_path.suffix
+        if suffix in HANDLERS: files.sources.append(file_path)
+        elif suffix in (".yml", ".yaml") and ".github/workflows" in str(file_path): files.workflows.append(file_path)
+        elif suffix == ".csproj": files.csproj.append(file_path)
+        elif file_path.name == "package.json": files.package_json.append(file_path)
+    return files
+
+def analyze_source_files(file_paths: List[Path], repo_root: Path) -> List[InfraResource]:
+    """Runs each file's analyzer; this is the unit of work handed to the process pool."""
+    resources, prefix_len = [], len(str(repo_root)) + 1  # Walked paths all start with the root, so slicing makes them relative
+    for file_path in file_paths: resources.extend(HANDLERS[file_path.suffix](file_path, str(file_path)[prefix_len:]))
+    return resources
+
+def analyze_sdk_usage(files: RepoFiles, repo_path: Path) -> Dict[str, List[ServiceInteraction]]:
+    interactions, prefix_len = {"Cosmos DB": [], "Blob Storage": []}, len(str(repo_path)) + 1
+    for csproj in files.csproj:
         try:
-            content = csproj.read_text(encoding='utf-8')
-            if 'Include="Microsoft.Azure.Cosmos"' in content: interactions["Cosmos DB"].append(ServiceInteraction("Unknown", "SDK Usage", ".NET", f"{csproj.relative_to(repo_path)}"))
-            if 'Include="Azure.Storage.Blobs"' in content: interactions["Blob Storage"].append(ServiceInteraction("Unknown", "SDK Usage", ".NET", f"{csproj.relative_to(repo_path)}"))
+            content, rel_path = csproj.read_text(encoding='utf-8'), str(csproj)[prefix_len:]
+            if 'Include="Microsoft.Azure.Cosmos"' in content: interactions["Cosmos DB"].append(ServiceInteraction("Unknown", "SDK Usage", ".NET", rel_path))
+            if 'Include="Azure.Storage.Blobs"' in content: interactions["Blob Storage"].append(ServiceInteraction("Unknown", "SDK Usage", ".NET", rel_path))
         except Exception as e: print(f"Warning: Could not parse {csproj}: {e}")
-    for pkg_json in repo_path.rglob("package.json"):
+    for pkg_json in files.package_json:
         try:
-            data, dependencies = json.loads(pkg_json.read_text(encoding='utf-8')), {}
+            data, dependencies, rel_path = _json_loads(pkg_json.read_bytes()), {}, str(pkg_json)[prefix_len:]
             dependencies.update(data.get("dependencies", {})); dependencies.update(data.get("devDependencies", {}))
-            if "@azure/cosmos" in dependencies: interactions["Cosmos DB"].append(ServiceInteraction("Unknown", "SDK Usage", "Node.js", f"{pkg_json.relative_to(repo_path)}"))
-            if "@azure/storage-blob" in dependencies: interactions["Blob Storage"].append(ServiceInteraction("Unknown", "SDK Usage", "Node.js", f"{pkg_json.relative_to(repo_path)}"))
+            if "@azure/cosmos" in dependencies: interactions["Cosmos DB"].append(ServiceInteraction("Unknown", "SDK Usage", "Node.js", rel_path))
+            if "@azure/storage-blob" in dependencies: interactions["Blob Storage"].append(ServiceInteraction("Unknown", "SDK Usage", "Node.js", rel_path))
         except Exception as e: print(f"Warning: Could not parse {pkg_json}: {e}")
     return interactions
 
-def summarize_workflow_file(file_path: Path) -> WorkflowSummary:
-    """Parses a GitHub Actions workflow file to get its name, triggers, and jobs."""
+def load_workflow(file_path: Path) -> Any:
+    """Parses a workflow file once; both the summary and the CLI step scan use the result."""
+    try: return yaml.load(file_path.read_text(encoding='utf-8'), Loader=YAML_LOADER)
+    except Exception as e: print(f"Warning: Could not parse workflow {file_path}: {e}"); return None
+
+def summarize_workflow(file_path: Path, workflow: Any) -> WorkflowSummary:
+    """Gets a parsed GitHub Actions workflow's name, triggers, and jobs."""
     name, triggers, job_names = "Unnamed Workflow", "Unknown", []
     try:
-        workflow = yaml.safe_load(file_path.read_text(encoding='utf-8'))
         if isinstance(workflow, dict):
             name = workflow.get("name", file_path.name)
             on_trigger = workflow.get("on", "Unknown")
@@ -124,136 +239,242 @@ def summarize_workflow_file(file_path: Path) -> WorkflowSummary:
     except Exception as e: print(f"Warning: Could not summarize workflow {file_path}: {e}")
     return WorkflowSummary(name, str(file_path.name), triggers, job_names)
 
+def analyze_workflows(workflow_files: List[Path], repo_path: Path) -> Tuple[List[WorkflowSummary], List[InfraResource]]:
+    """Summarizes each workflow and collects resources created by its azure/cli steps."""
+    workflows, resources, prefix_len = [], [], len(str(repo_path)) + 1
+    for f in workflow_files:
+        workflow, rel_path = load_workflow(f), str(f)[prefix_len:]
+        workflows.append(summarize_workflow(f, workflow))
+        if not isinstance(workflow, dict): continue
+        try:
+            for job_id, job in workflow.get("jobs", {}).items():
+                for i, step in enumerate(job.get("steps", [])):
+                    if isinstance(step, dict) and "azure/cli" in step.get("uses", ""):
+                        script = step.get("with", {}).get("inlineScript", "")
+                        if script: resources.extend(analyze_shell_content(script, f"{rel_path} (Job: {job_id})", "GitHub Actions"))
+        except Exception as e: print(f"Warning: Could not parse workflow {f} for CLI steps: {e}")
+    return workflows, resources
+
 
 # --- Core Repository Processing ---
 
+# Private repositories fail fast instead of waiting on a credentials prompt (several at once, with concurrent repos)
+GIT_NO_PROMPT_ENV = {**os.environ, "GIT_TERMINAL_PROMPT": "0"}
+
+async def run_git(*args: str) -> Tuple[int, str]:
+    process = await asyncio.create_subprocess_exec("git", *args, stderr=asyncio.subprocess.PIPE, env=GIT_NO_PROMPT_ENV)
+    _, stderr = await process.communicate()
+    return process.returncode, stderr.decode().strip()
+
+CHECKOUT_NAME_RE = re.compile(r"[^\w.-]+")
+
+def checkout_dir(work_dir: Path, repo_url: str) -> Path:
+    # Host, owner and repo all go into the name, so same-named repositories never share a kept checkout
+    return work_dir / CHECKOUT_NAME_RE.sub("_", repo_url.split("://", 1)[-1].strip("/"))
+
+async def checkout_origin(target_dir: Path) -> Optional[str]:
+    process = await asyncio.create_subprocess_exec("git", "-C", str(target_dir), "remote", "get-url", "origin", stdout=asyncio.subprocess.PIPE, stderr=asyncio.subprocess.DEVNULL)
+    stdout, _ = await process.communicate()
+    return stdout.decode().strip() if process.returncode == 0 else None
+
+async def update_checkout(repo_url: str, target_dir: Path) -> bool:
+    """Brings a checkout kept by an earlier --keep run up to the remote HEAD. False if it is left as it was."""
+    returncode, stderr = await run_git("-C", str(target_dir), "fetch", "--quiet", "--depth=1", "--filter=blob:none", repo_url, "HEAD")
+    if returncode == 0: returncode, stderr = await run_git("-C", str(target_dir), "reset", "--hard", "--quiet", "FETCH_HEAD")
+    if returncode != 0: print(f"Warning: Could not update the existing checkout of {repo_url}, analyzing it as is: {stderr}")
+    return returncode == 0
+
 async def clone_repo(repo_url: str, target_dir: Path) -> bool:
-    if target_dir.exists(): return True
     target_dir.mkdir(parents=True, exist_ok=True)
-    process = await asyncio.create_subprocess_exec("git", "clone", "--depth=1", repo_url, str(target_dir), stderr=asyncio.subprocess.PIPE)
-    _, stderr = await process.communicate()
-    if process.returncode != 0: print(f"Error cloning {repo_url}: {stderr.decode().strip()}"); return False
+    # Blobless clone without a checkout, then check out only what the analyzers read
+    returncode, stderr = await run_git("clone", "--depth=1", "--filter=blob:none", "--no-checkout", repo_url, str(target_dir))
+    if returncode != 0: print(f"Error cloning {repo_url}: {stderr}"); return False
+    returncode, stderr = await run_git("-C", str(target_dir), "sparse-checkout", "set", "--no-cone", *SPARSE_CHECKOUT_PATTERNS)
+    if returncode != 0: print(f"Warning: Sparse checkout failed for {repo_url}, checking out everything: {stderr}")
+    returncode, stderr = await run_git("-C", str(target_dir), "checkout", "--quiet")
+    if returncode != 0: print(f"Error checking out {repo_url}: {stderr}"); return False
     return True
 
-async def analyze_repository(repo_url: str, work_dir: Path) -> RepoReport:
-    repo_name, repo_path = repo_url.split('/')[-1], work_dir / repo_url.split('/')[-1]
+async def remote_head(repo_url: str) -> Optional[str]:
+    """Returns the commit the remote HEAD points at, in one round trip and without cloning."""
+    process = await asyncio.create_subprocess_exec("git", "ls-remote", repo_url, "HEAD", stdout=asyncio.subprocess.PIPE, stderr=asyncio.subprocess.DEVNULL, env=GIT_NO_PROMPT_ENV)
+    stdout, _ = await process.communicate()
+    return stdout.split()[0].decode() if process.returncode == 0 and stdout.strip() else None
+
+def report_cache_file(sha: str, repo_url: str) -> Path:
+    # Keyed by repository as well as commit, so one repository's report is never served for another
+    return REPORT_CACHE_DIR / f"{hashlib.sha256(f'{repo_url}@{sha}'.encode()).hexdigest()}.json"
+
+def load_cached_report(sha: str, repo_url: str, repo_name: str) -> Optional[RepoReport]:
+    cache_file = report_cache_file(sha, repo_url)
+    try:
+        data = json.loads(cache_file.read_text(encoding='utf-8'))
+        if data.get("version") != REPORT_CACHE_VERSION: return None
+        report = RepoReport(
+            url=repo_url, name=repo_name,
+            resources=[InfraResource(**r) for r in data["resources"]],
+            service_interactions={service: [ServiceInteraction(**i) for i in interactions] for service, interactions in data["service_interactions"].items()},
+            workflows=[WorkflowSummary(**w) for w in data["workflows"]])
+    except (OSError, ValueError, KeyError, TypeError, AttributeError): return None  # Unreadable or malformed entries are misses
+    try: os.utime(cache_file)  # The mtime is the last use, for eviction
+    except OSError: pass
+    return report
+
+def prune_report_cache():
+    entries = []
+    for cache_file in REPORT_CACHE_DIR.glob("*.json"):
+        try: entries.append((cache_file.stat().st_mtime, cache_file))
+        except OSError: pass
+    for _, cache_file in sorted(entries, reverse=True)[REPORT_CACHE_MAX_ENTRIES:]: cache_file.unlink(missing_ok=True)
+
+def save_cached_report(sha: str, report: RepoReport):
+    data = {"version": REPORT_CACHE_VERSION, "resources": [asdict(r) for r in report.resources], "workflows": [asdict(w) for w in report.workflows],
+            "service_interactions": {service: [asdict(i) for i in interactions] for service, interactions in report.service_interactions.items()}}
+    try:
+        REPORT_CACHE_DIR.mkdir(parents=True, exist_ok=True)
+        report_cache_file(sha, report.url).write_text(json.dumps(data), encoding='utf-8')
+        prune_report_cache()
+    except OSError as e: print(f"Warning: Could not cache the report for {report.url}: {e}")
+
+async def analyze_repository(repo_url: str, work_dir: Path, pool: Optional[Executor] = None, use_cache: bool = True) -> RepoReport:
+    """Clones and analyzes one repository. Source files are analyzed in batches on `pool`
+    (the default thread pool if None), so the CPU-bound parsing runs off the event loop.
+    With use_cache, a commit analyzed by an earlier run is not cloned again."""
+    repo_name, repo_path = repo_url.split('/')[-1], checkout_dir(work_dir, repo_url)
+    head = await remote_head(repo_url) if use_cache else None
+    cached = load_cached_report(head, repo_url, repo_name) if head else None
+    if cached: print(f"[{repo_name}] Unchanged since a previous run ({head[:12]}), reusing its report."); return cached
     report = RepoReport(url=repo_url, name=repo_name)
 
     print(f"[{repo_name}] Cloning repository...")
-    if not await clone_repo(repo_url, repo_path): raise RuntimeError(f"Failed to clone {repo_url}")
+    up_to_date = True
+    if repo_path.exists() and not ((repo_path / ".git").is_dir() and await checkout_origin(repo_path) == repo_url):
+        # Left by an interrupted clone, or not a checkout of this repository; start from a fresh clone
+        print(f"[{repo_name}] Replacing an unusable checkout at {repo_path}")
+        await asyncio.to_thread(remove_tree, repo_path)
+    if repo_path.exists(): up_to_date = await update_checkout(repo_url, repo_path)
+    elif not await clone_repo(repo_url, repo_path): raise RuntimeError(f"Failed to clone {repo_url}")
     print(f"[{repo_name}] Searching for infrastructure files and SDKs...")
     
-    found_resources, workflow_files = [], []
-    for file_path in repo_path.rglob("*"):
-        if any(part in file_path.parts for part in ["node_modules", ".venv", "target", "dist", "build"]) or not file_path.is_file(): continue
-        
-        if file_path.suffix == ".py": found_resources.extend(analyze_python_file(file_path, repo_path))
-        elif file_path.suffix == ".ts": found_resources.extend(analyze_typescript_file(file_path, repo_path))
-        elif file_path.suffix == ".sh": found_resources.extend(analyze_shell_content(file_path.read_text(encoding='utf-8', errors='ignore'), str(file_path.relative_to(repo_path)), "Shell"))
-        elif file_path.suffix in [".yml", ".yaml"] and ".github/workflows" in str(file_path): workflow_files.append(file_path)
+    files = await asyncio.to_thread(collect_repo_files, repo_path)
+    loop = asyncio.get_running_loop()
+    batches = [files.sources[i:i + ANALYSIS_BATCH_SIZE] for i in range(0, len(files.sources), ANALYSIS_BATCH_SIZE)]
+    batch_results = await asyncio.gather(*(loop.run_in_executor(pool, analyze_source_files, batch, repo_path) for batch in batches))
+    # dict.fromkeys dedups in one pass and keeps first-seen order, so resources tying on the sort key stay in walk order
+    found_resources = dict.fromkeys(res for batch_resources in batch_results for res in batch_resources)
 
-    report.resources = sorted(list(set(found_resources)), key=lambda r: (r.language, r.resource_type, r.name))
-    report.service_interactions = analyze_sdk_usage(repo_path)
+    report.resources = sorted(found_resources, key=lambda r: (r.language, r.resource_type, r.name))
+    report.service_interactions = await asyncio.to_thread(analyze_sdk_usage, files, repo_path)
     if yaml:
-        report.workflows = [summarize_workflow_file(f) for f in workflow_files]
-        for f in workflow_files:
-            try:
-                workflow = yaml.safe_load(f.read_text(encoding='utf-8'))
-                for job_id, job in workflow.get("jobs", {}).items():
-                    for i, step in enumerate(job.get("steps", [])):
-                        if isinstance(step, dict) and "azure/cli" in step.get("uses", ""):
-                            script = step.get("with", {}).get("inlineScript", "")
-                            if script: report.resources.extend(analyze_shell_content(script, f"{f.relative_to(repo_path)} (Job: {job_id})", "GitHub Actions"))
-            except Exception as e: print(f"Warning: Could not parse workflow {f} for CLI steps: {e}")
+        report.workflows, workflow_resources = await asyncio.to_thread(analyze_workflows, files.workflows, repo_path)
+        report.resources.extend(workflow_resources)
 
     for res in report.resources:
         res_type_lower = res.resource_type.lower()
-        if any(keyword in res_type_lower for keyword in COSMOSDB_KEYWORDS): report.service_interactions["Cosmos DB"].append(ServiceInteraction(res.name, "IaC Resource", res.language, res.resource_type))
-        if any(keyword in res_type_lower for keyword in BLOBSTORAGE_KEYWORDS): report.service_interactions["Blob Storage"].append(ServiceInteraction(res.name, "IaC Resource", res.language, res.resource_type))
+        if COSMOSDB_RE.search(res_type_lower): report.service_interactions["Cosmos DB"].append(ServiceInteraction(res.name, "IaC Resource", res.language, res.resource_type))
+        if BLOBSTORAGE_RE.search(res_type_lower): report.service_interactions["Blob Storage"].append(ServiceInteraction(res.name, "IaC Resource", res.language, res.resource_type))
 
+    # A checkout that couldn't be updated may be older than head, so its report isn't cached under it
+    if head and up_to_date: save_cached_report(head, report)
     print(f"[{repo_name}] Analysis complete.")
     return report
 
 # --- Report Generation & Main ---
 
 def write_md_report(reports: List[RepoReport], filename: str):
-    with open(filename, 'w', encoding='utf-8') as f:
-        f.write(f"# Infrastructure Report\n\n_Generated on {time.ctime()}_\n\n## 📜 Overall Summary\n\n")
-        
-        # --- NEW: Licensing Section ---
-        f.write("### Licensing\n\n")
-        try:
-            with open(AZURE_LICENSE_FILE, 'r', encoding='utf-8') as license_file:
-                f.write(license_file.read())
-            f.write("\n\n_For official terms, please refer to the [Microsoft Azure Legal Information](https://azure.microsoft.com/en-us/support/legal/)._\n")
-        except FileNotFoundError:
-            f.write(f"**Note:** The license file `{AZURE_LICENSE_FILE}` was not found.\n")
-        f.write("\n---\n\n")
-
-        # --- Service-Specific Summaries ---
-        for service_name in ["Cosmos DB", "Blob Storage"]:
-            all_interactions = [(inter, r.name) for r in reports for inter in r.service_interactions.get(service_name, [])]
-            if all_interactions:
-                f.write(f"### {service_name} Analysis\n\n| Repository | Interaction Type | Detected Language | Details |\n|---|---|---|---|\n")
-                for interaction, repo_name in sorted(all_interactions, key=lambda x: (x[1], x[0].interaction_type)):
-                    f.write(f"| {repo_name} | {interaction.interaction_type} | {interaction.language} | `{interaction.details}` |\n")
-                f.write("\n---\n\n")
+    """Assembles the whole report in memory and writes it with a single call."""
+    out = []
+    out.append(f"# Infrastructure Report\n\n_Generated on {time.ctime()}_\n\n## 📜 Overall Summary\n\n")
+    
+    # --- NEW: Licensing Section ---
+    out.append("### Licensing\n\n")
+    try:
+        out.append(Path(AZURE_LICENSE_FILE).read_text(encoding='utf-8'))
+        out.append("\n\n_For official terms, please refer to the [Microsoft Azure Legal Information](https://azure.microsoft.com/en-us/support/legal/)._\n")
+    except FileNotFoundError:
+        out.append(f"**Note:** The license file `{AZURE_LICENSE_FILE}` was not found.\n")
+    out.append("\n---\n\n")
+
+    # --- Service-Specific Summaries ---
+    for service_name in ["Cosmos DB", "Blob Storage"]:
+        all_interactions = [(inter, r.name) for r in reports for inter in r.service_interactions.get(service_name, [])]
+        if all_interactions:
+            rows = [f"| {repo_name} | {interaction.interaction_type} | {interaction.language} | `{interaction.details}` |\n"
+                    for interaction, repo_name in sorted(all_interactions, key=lambda x: (x[1], x[0].interaction_type))]
+            out.append(f"### {service_name} Analysis\n\n| Repository | Interaction Type | Detected Language | Details |\n|---|---|---|---|\n{''.join(rows)}\n---\n\n")
+    
+    rows = [f"| `{res_type}` | {count} |\n" for res_type, count in Counter(res.resource_type for r in reports for res in r.resources).most_common()]
+    out.append(f"### General Resource Count by Type\n\n| Resource Type | Count |\n|---|---|\n{''.join(rows)}")
+    
+    out.append("\n---\n\n## 📚 Repository Details\n\n")
+    for report in sorted(reports, key=lambda r: r.name):
+        out.append(f"### [{report.name}]({report.url})\n\n")
+        has_content = False
+        if report.workflows:
+            has_content = True
+            rows = [f"| `{wf.path}` | {wf.triggers} | {', '.join(wf.job_names)} |\n" for wf in sorted(report.workflows, key=lambda x: x.name)]
+            out.append(f"#### GitHub Workflow Summary\n\n| Workflow File | Triggers | Job Names |\n|---|---|---|\n{''.join(rows)}\n")
         
-        all_resources = [res for r in reports for res in r.resources]
-        f.write("### General Resource Count by Type\n\n| Resource Type | Count |\n|---|---|\n")
-        for res_type, count in Counter(res.resource_type for res in all_resources).most_common(): f.write(f"| `{res_type}` | {count} |\n")
+        service_interactions = [(s, i) for s, il in report.service_interactions.items() for i in il]
+        if service_interactions:
+            has_content = True
+            rows = [f"| {service} | {inter.interaction_type} | {inter.language} | `{inter.details}` |\n" for service, inter in sorted(service_interactions, key=lambda x: (x[0], x[1].interaction_type))]
+            out.append(f"#### Detected Service Interactions\n\n| Service | Type | Language | Details |\n|---|---|---|---|\n{''.join(rows)}\n")
+
+        if report.resources:
+            has_content = True
+            rows = [f"| {res.language} | `{res.resource_type}` | `{res.name}` |\n" for res in report.resources]
+            out.append(f"#### All Infrastructure Resources\n\n| Language / Source | Resource Type | Name |\n|---|---|---|\n{''.join(rows)}\n")
         
-        f.write("\n---\n\n## 📚 Repository Details\n\n")
-        for report in sorted(reports, key=lambda r: r.name):
-            f.write(f"### [{report.name}]({report.url})\n\n")
-            has_content = False
-            if report.workflows:
-                has_content = True
-                f.write("#### GitHub Workflow Summary\n\n| Workflow File | Triggers | Job Names |\n|---|---|---|\n")
-                for wf in sorted(report.workflows, key=lambda x: x.name): f.write(f"| `{wf.path}` | {wf.triggers} | {', '.join(wf.job_names)} |\n")
-                f.write("\n")
-            
-            service_interactions = [(s, i) for s, il in report.service_interactions.items() for i in il]
-            if service_interactions:
-                has_content = True
-                f.write("#### Detected Service Interactions\n\n| Service | Type | Language | Details |\n|---|---|---|---|\n")
-                for service, inter in sorted(service_interactions, key=lambda x: (x[0], x[1].interaction_type)): f.write(f"| {service} | {inter.interaction_type} | {inter.language} | `{inter.details}` |\n")
-                f.write("\n")
-
-            if report.resources:
-                has_content = True
-                f.write("#### All Infrastructure Resources\n\n| Language / Source | Resource Type | Name |\n|---|---|---|\n")
-                for res in report.resources: f.write(f"| {res.language} | `{res.resource_type}` | `{res.name}` |\n")
-                f.write("\n")
-            
-            if not has_content: f.write("_No infrastructure resources or specific service interactions found._\n\n")
-
-def load_repositories(filename: str) -> List[str]:
-    if not Path(filename).exists(): return []
-    with open(filename, 'r') as f: return [line.strip() for line in f if line.strip() and not line.startswith('#')]
+        if not has_content: out.append("_No infrastructure resources or specific service interactions found._\n\n")
+    Path(filename).write_text("".join(out), encoding='utf-8')
+
+@lru_cache(maxsize=8)
+def _read_repositories(filename: str, _mtime: float) -> Tuple[str, ...]:
+    # _mtime is only part of the cache key, so editing the file invalidates the entry
+    return tuple(line.strip() for line in Path(filename).read_text().splitlines() if line.strip() and not line.startswith('#'))
+
+def load_repositories(filename: str) -> Tuple[str, ...]:
+    try: mtime = Path(filename).stat().st_mtime
+    except FileNotFoundError: return ()
+    return _read_repositories(filename, mtime)
 
 def on_rm_error(func, path, exc_info):
     os.chmod(path, stat.S_IWRITE); func(path)
 
-async def main():
+def remove_tree(path: Path):
+    # onerror is deprecated from 3.12; on_rm_error ignores its third argument, so it serves both
+    if sys.version_info >= (3, 12): shutil.rmtree(path, onexc=on_rm_error)
+    else: shutil.rmtree(path, onerror=on_rm_error)
+
+async def main(use_cache: bool = True, keep: bool = False):
     repos = load_repositories(REPOS_FILE)
     if not repos: print(f"Error: `{REPOS_FILE}` is empty or not found."); return
-    temp_dir = Path(tempfile.mkdtemp(prefix="infra_analyzer_"))
-    print(f"Using temporary directory: {temp_dir}")
+    if keep: temp_dir = KEPT_CHECKOUTS_DIR; temp_dir.mkdir(parents=True, exist_ok=True); print(f"Using checkout directory: {temp_dir}")
+    else: temp_dir = Path(tempfile.mkdtemp(prefix="infra_analyzer_")); print(f"Using temporary directory: {temp_dir}")
     try:
         repo_semaphore = asyncio.Semaphore(MAX_CONCURRENT_REPOS)
-        async def constrained_analyzer(repo_url: str):
-            async with repo_semaphore: return await analyze_repository(repo_url, temp_dir)
-        tasks = [constrained_analyzer(url) for url in repos]
-        results = await asyncio.gather(*tasks, return_exceptions=True)
+        # Workers start lazily, after to_thread has started threads, and forking a threaded process can deadlock
+        mp_context = multiprocessing.get_context("forkserver" if "forkserver" in multiprocessing.get_all_start_methods() else "spawn")
+        with ProcessPoolExecutor(mp_context=mp_context) as pool:  # AST and regex work scales past one core
+            async def constrained_analyzer(repo_url: str):
+                async with repo_semaphore: return await analyze_repository(repo_url, temp_dir, pool, use_cache)
+            tasks = [constrained_analyzer(url) for url in repos]
+            results = await asyncio.gather(*tasks, return_exceptions=True)
         successful_reports = [r for r in results if not isinstance(r, Exception)]
         if successful_reports: write_md_report(successful_reports, MD_REPORT_FILE)
     finally:
-        if temp_dir.exists(): shutil.rmtree(temp_dir, onerror=on_rm_error)
-        print("Successfully cleaned up temporary directory.")
+        if keep: print(f"Keeping checkouts in {temp_dir} for the next run.")
+        else:
+            if temp_dir.exists(): remove_tree(temp_dir)
+            print("Successfully cleaned up temporary directory.")
     print("Done.")
 
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=f"Reports the infrastructure used by the repositories in `{REPOS_FILE}`.")
+    parser.add_argument("--no-cache", action="store_true", help=f"re-analyze every repository instead of reusing reports cached in {REPORT_CACHE_DIR}")
+    parser.add_argument("--keep", action="store_true", help=f"keep checkouts in {KEPT_CHECKOUTS_DIR} and update them on the next run instead of cloning again")
+    args = parser.parse_args()
     if shutil.which("git") is None: print("Error: Git is not installed or not in your PATH.")
     elif yaml is None: print("Required library PyYAML is missing. Please run `pip install PyYAML` to enable all features.")
-    else: asyncio.run(main())
\ No newline at end of file
+    else: asyncio.run(main(use_cache=not args.no_cache, keep=args.keep))
\ No newline at end of file